@@ -1,8 +1,18 @@
 from importlib.metadata import PackageNotFoundError, version
 
-from .models import MessagesResponse, parse_message
+from .envelope import MessageEnvelope
+from .models import MessagesResponse, parse_message, parse_message_json, parse_messages
+from .projection import MessageProjection, parse_message_fields
 
-__all__ = ["parse_message", "MessagesResponse"]
+__all__ = [
+    "parse_message",
+    "parse_message_json",
+    "parse_messages",
+    "parse_message_fields",
+    "MessageEnvelope",
+    "MessageProjection",
+    "MessagesResponse",
+]
 
 try:
     __version__ = version("aleph-message")
@@ -0,0 +1,113 @@
+"""Parsing of messages from asyncio applications.
+
+Validating and hashing messages is CPU-bound, so doing it in a coroutine
+blocks the event loop. The functions defined here run the validation in an
+executor instead.
+
+The default executor of the event loop is a thread pool, which keeps the loop
+responsive but still shares the GIL with it. Pass a `ProcessPoolExecutor` to
+validate messages in parallel.
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import Executor
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Deque,
+    Dict,
+    Iterable,
+    Optional,
+    Union,
+)
+
+from .models import AlephMessage, ValidationLevel, parse_message, parse_message_json
+
+DEFAULT_MAX_IN_FLIGHT = 64
+
+RawMessage = Union[bytes, bytearray, str, Dict[str, Any]]
+
+
+def _parse_raw_message(
+    raw_message: RawMessage, validation_level: ValidationLevel
+) -> AlephMessage:
+    if isinstance(raw_message, dict):
+        return parse_message(raw_message, validation_level)
+    return parse_message_json(raw_message, validation_level)
+
+
+async def aparse_message(
+    message_dict: Dict,
+    validation_level: ValidationLevel = ValidationLevel.full,
+    executor: Optional[Executor] = None,
+) -> AlephMessage:
+    """Parse a message dict in an executor, see `parse_message`."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, parse_message, message_dict, validation_level
+    )
+
+
+async def aparse_message_json(
+    json_data: Union[bytes, bytearray, str],
+    validation_level: ValidationLevel = ValidationLevel.full,
+    executor: Optional[Executor] = None,
+) -> AlephMessage:
+    """Parse a JSON serialized message in an executor, see `parse_message_json`."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, parse_message_json, json_data, validation_level
+    )
+
+
+async def _aiter(
+    source: Union[AsyncIterable[RawMessage], Iterable[RawMessage]],
+) -> AsyncIterator[RawMessage]:
+    if isinstance(source, AsyncIterable):
+        async for item in source:
+            yield item
+    else:
+        for item in source:
+            yield item
+
+
+async def aiter_messages(
+    source: Union[AsyncIterable[RawMessage], Iterable[RawMessage]],
+    validation_level: ValidationLevel = ValidationLevel.full,
+    executor: Optional[Executor] = None,
+    max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+) -> AsyncIterator[AlephMessage]:
+    """Parse a stream of raw messages in an executor.
+
+    Raw messages are either dicts or JSON serialized messages. Parsed messages
+    are yielded in the order of the source.
+
+    At most `max_in_flight` messages are being parsed at any time. The source
+    is not read further until the oldest of them has been yielded, so that
+    fast producers are slowed down to the pace of the validation and of the
+    consumer.
+
+    A message that fails validation raises its `ValidationError` from the
+    iterator, and the parsing of the following messages is cancelled.
+    """
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1")
+
+    loop = asyncio.get_running_loop()
+    in_flight: Deque[asyncio.Future] = deque()
+    try:
+        async for raw_message in _aiter(source):
+            in_flight.append(
+                loop.run_in_executor(
+                    executor, _parse_raw_message, raw_message, validation_level
+                )
+            )
+            if len(in_flight) >= max_in_flight:
+                yield await in_flight.popleft()
+        while in_flight:
+            yield await in_flight.popleft()
+    finally:
+        for future in in_flight:
+            future.cancel()
@@ -0,0 +1,260 @@
+"""Read-only archives of messages, memory-mapped and indexed by item hash.
+
+An archive is made of two files: an append-only data file of messages in
+the binary encoding of `aleph_message.wire`, each prefixed by its length,
+and an index file of the digests of their item hashes and the offsets of
+their records, sorted by digest. Both files are memory-mapped, so opening an
+archive does not read it, and looking up a message is a binary search in
+the index and the decoding of one record:
+
+    with MessageArchiveBuilder("messages.archive") as builder:
+        builder.write_many(messages)
+
+    with MessageArchive("messages.archive", ValidationLevel.trusted) as archive:
+        message = archive[item_hash]
+
+Messages are indexed by the SHA-256 digest of their item hash, see
+`ItemHash.digest`, so that item hashes of other IPFS hash functions are not
+supported. The CIDv0 and CIDv1 of the same content are the same key.
+"""
+
+import bisect
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .models import AlephMessage, ItemHash, ValidationLevel
+from .models.item_hash import DIGEST_SIZE
+from .wire import decode_message, encode_message
+
+INDEX_SUFFIX = ".index"
+
+_INDEX_MAGIC = b"AMIX"
+_INDEX_VERSION = 1
+# Magic, version, number of entries and size of the indexed data file.
+_INDEX_HEADER = struct.Struct("<4sB3xQQ")
+# Digest of the item hash and offset of the record in the data file.
+_INDEX_ENTRY = struct.Struct(f"<{DIGEST_SIZE}sQ")
+_RECORD_LENGTH = struct.Struct("<I")
+
+ArchivePath = Union[str, Path]
+
+
+def _index_path(path: ArchivePath, index_path: Optional[ArchivePath]) -> Path:
+    if index_path is not None:
+        return Path(index_path)
+    return Path(f"{path}{INDEX_SUFFIX}")
+
+
+def _map(fd: IO[bytes]) -> Union[mmap.mmap, bytes]:
+    # Empty files cannot be memory-mapped
+    if os.fstat(fd.fileno()).st_size == 0:
+        return b""
+    return mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _read_index_header(index: Union[mmap.mmap, bytes]) -> Tuple[int, int]:
+    """Number of entries and size of the indexed data of an index."""
+    if len(index) < _INDEX_HEADER.size:
+        raise ValueError("Truncated archive index")
+    magic, version, count, data_size = _INDEX_HEADER.unpack_from(index)
+    if magic != _INDEX_MAGIC:
+        raise ValueError("Not an archive index")
+    if version != _INDEX_VERSION:
+        raise ValueError(f"Unsupported version {version} of the archive index")
+    if len(index) != _INDEX_HEADER.size + count * _INDEX_ENTRY.size:
+        raise ValueError("Truncated archive index")
+    return count, data_size
+
+
+class MessageArchiveBuilder:
+    """Writer of messages to an archive, see `MessageArchive`.
+
+    Messages are appended to the data file at `path`, and the index is
+    written to `index_path`, which defaults to `path` with the `.index`
+    suffix, when the builder is closed. Messages written to an existing
+    archive are added to it; data written after its index, such as by a
+    builder that was not closed, is discarded. Raises a `ValueError` for a
+    data file that is not empty and has no index.
+
+    `write` raises a `ValueError` for messages whose item hash has no
+    SHA-256 digest. See `encode_message` for `content_from_item_content`.
+    """
+
+    def __init__(
+        self,
+        path: ArchivePath,
+        index_path: Optional[ArchivePath] = None,
+        content_from_item_content: bool = False,
+    ):
+        self._index_path = _index_path(path, index_path)
+        self._content_from_item_content = content_from_item_content
+        self._entries: List[Tuple[bytes, int]] = []
+        data_size = 0
+        if not self._index_path.exists():
+            # Do not truncate messages that could be recovered
+            if Path(path).exists() and Path(path).stat().st_size:
+                raise ValueError("Archive data without index")
+        elif Path(path).exists():
+            with open(self._index_path, "rb") as fd:
+                index = fd.read()
+            _, data_size = _read_index_header(index)
+            if Path(path).stat().st_size < data_size:
+                raise ValueError("Truncated archive data")
+            self._entries = list(
+                _INDEX_ENTRY.iter_unpack(memoryview(index)[_INDEX_HEADER.size :])
+            )
+        self._file = open(path, "r+b" if data_size else "wb")
+        self._file.truncate(data_size)
+        self._file.seek(data_size)
+        self._offset = data_size
+        self.count = 0
+        """Number of messages written"""
+
+    def write(self, message: AlephMessage) -> None:
+        """Append a message to the archive."""
+        digest = message.item_hash.digest
+        record = encode_message(message, self._content_from_item_content)
+        self._file.write(_RECORD_LENGTH.pack(len(record)))
+        self._file.write(record)
+        self._entries.append((digest, self._offset))
+        self._offset += _RECORD_LENGTH.size + len(record)
+        self.count += 1
+
+    def write_many(self, messages: Iterable[AlephMessage]) -> int:
+        """Append messages in order, returns the number of messages written."""
+        count = self.count
+        for message in messages:
+            self.write(message)
+        return self.count - count
+
+    def close(self) -> None:
+        """Write the data and the index of the archive."""
+        if self._file.closed:
+            return
+        self._file.close()
+        # Sorting is stable: the first message written with a digest is the
+        # one that is found.
+        self._entries.sort(key=lambda entry: entry[0])
+        header = _INDEX_HEADER.pack(
+            _INDEX_MAGIC, _INDEX_VERSION, len(self._entries), self._offset
+        )
+        with open(self._index_path, "wb") as fd:
+            fd.write(header)
+            fd.write(b"".join(_INDEX_ENTRY.pack(*entry) for entry in self._entries))
+
+    def __enter__(self) -> "MessageArchiveBuilder":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class _Digests:
+    """Digests of the entries of an index, for binary searches."""
+
+    __slots__ = ("_index", "_count")
+
+    def __init__(self, index: Union[mmap.mmap, bytes], count: int):
+        self._index = index
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position: int) -> bytes:
+        start = _INDEX_HEADER.size + position * _INDEX_ENTRY.size
+        return self._index[start : start + DIGEST_SIZE]
+
+
+class MessageArchive:
+    """Read-only archive of messages, written by `MessageArchiveBuilder`.
+
+    Messages are decoded when they are accessed, with `validation_level`:
+    use `ValidationLevel.trusted` for archives written from validated
+    messages. See `decode_message` for `lazy_content`.
+    """
+
+    def __init__(
+        self,
+        path: ArchivePath,
+        validation_level: ValidationLevel = ValidationLevel.full,
+        index_path: Optional[ArchivePath] = None,
+        lazy_content: bool = False,
+    ):
+        self.validation_level = validation_level
+        self.lazy_content = lazy_content
+        with open(path, "rb") as fd:
+            self._data = _map(fd)
+        with open(_index_path(path, index_path), "rb") as fd:
+            self._index = _map(fd)
+        self._count, self._data_size = _read_index_header(self._index)
+        if len(self._data) < self._data_size:
+            raise ValueError("Truncated archive data")
+        self._digests = _Digests(self._index, self._count)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _offset(self, item_hash: str) -> Optional[int]:
+        try:
+            digest = ItemHash(item_hash).digest
+        except ValueError:
+            return None
+        position = bisect.bisect_left(self._digests, digest)
+        if position == self._count or self._digests[position] != digest:
+            return None
+        start = _INDEX_HEADER.size + position * _INDEX_ENTRY.size
+        _, offset = _INDEX_ENTRY.unpack_from(self._index, start)
+        return offset
+
+    def _record(self, offset: int) -> Tuple[bytes, int]:
+        """Record at an offset of the data, and the offset of the next one."""
+        (length,) = _RECORD_LENGTH.unpack_from(self._data, offset)
+        start = offset + _RECORD_LENGTH.size
+        end = start + length
+        if end > self._data_size:
+            raise ValueError("Truncated archive data")
+        return self._data[start:end], end
+
+    def _decode(self, record: bytes) -> AlephMessage:
+        return decode_message(
+            record, self.validation_level, lazy_content=self.lazy_content
+        )
+
+    def __contains__(self, item_hash: object) -> bool:
+        return isinstance(item_hash, str) and self._offset(item_hash) is not None
+
+    def get(self, item_hash: str) -> Optional[AlephMessage]:
+        """Message with the given item hash, or None if not in the archive."""
+        offset = self._offset(item_hash)
+        if offset is None:
+            return None
+        record, _ = self._record(offset)
+        return self._decode(record)
+
+    def __getitem__(self, item_hash: str) -> AlephMessage:
+        message = self.get(item_hash)
+        if message is None:
+            raise KeyError(item_hash)
+        return message
+
+    def __iter__(self) -> Iterator[AlephMessage]:
+        """Messages of the archive, in the order they were written."""
+        offset = 0
+        while offset < self._data_size:
+            record, offset = self._record(offset)
+            yield self._decode(record)
+
+    def close(self) -> None:
+        for mapping in (self._data, self._index):
+            if isinstance(mapping, mmap.mmap):
+                mapping.close()
+
+    def __enter__(self) -> "MessageArchive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,159 @@
+"""Performance benchmarks of the message models.
+
+Run them with `python -m aleph_message.benchmarks`, which prints one JSON
+object per benchmark on the standard output, so that results can be compared
+between versions of the library.
+"""
+
+import json
+import random
+import timeit
+from dataclasses import asdict, dataclass
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..envelope import MessageEnvelope
+from ..models import (
+    ItemHash,
+    MessagesResponse,
+    MessageType,
+    ProgramMessage,
+    add_item_content_and_hash,
+    create_new_message,
+    parse_message,
+    parse_message_json,
+    parse_messages,
+)
+from ..models.canonical import dump_canonical_json
+from ..projection import MessageProjection
+from ..wire import decode_message, encode_message
+from .corpus import (
+    fixture_messages,
+    messages_response,
+    synthetic_message,
+    synthetic_messages,
+)
+
+Benchmark = Tuple[str, Callable[[], object]]
+
+STORAGE_HASH = "b236db23bf5ad005ad7f5d82eed08a68a925020f0755b2a59c03f784499198eb"
+CIDV0_HASH = "QmPxCe3eHVCdTG5uKnSZTsPGrYvMFTWAAt4PSfK7ETkz4d"
+CIDV1_HASH = "bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi"
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    loops: int
+    """Number of calls per measurement"""
+    best: float
+    """Best time per call, in seconds"""
+    mean: float
+    """Mean time per call, in seconds"""
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+
+def iter_benchmarks(page_size: int = 1000) -> Iterator[Benchmark]:
+    """Benchmarks of the library, as `(name, function)` pairs."""
+    rng = random.Random(0)
+    samples: Dict[str, Dict] = {}
+    for message_dict in fixture_messages():
+        samples.setdefault(message_dict["type"], message_dict)
+    for message_type in (MessageType.post, MessageType.aggregate, MessageType.store):
+        samples[message_type.value] = synthetic_message(message_type, rng)
+
+    projection = MessageProjection(
+        {"item_hash", "type", "sender", "time", "size", "content.address"}
+    )
+    for type_name, message_dict in sorted(samples.items()):
+        json_data = json.dumps(message_dict).encode()
+        message = parse_message(message_dict)
+        yield f"parse_message[{type_name}]", partial(parse_message, message_dict)
+        yield (
+            f"parse_message_json[{type_name}]",
+            partial(parse_message_json, json_data),
+        )
+        yield (
+            f"parse_message[{type_name}, lazy_content]",
+            partial(parse_message, message_dict, lazy_content=True),
+        )
+        yield (
+            f"MessageEnvelope.from_dict[{type_name}]",
+            partial(MessageEnvelope.from_dict, message_dict),
+        )
+        yield (
+            f"MessageProjection.parse[{type_name}]",
+            partial(projection.parse, message_dict),
+        )
+        yield f"custom_dump[{type_name}]", message.custom_dump
+        yield f"model_dump_json[{type_name}]", message.model_dump_json
+        wire_data = encode_message(message)
+        yield f"encode_message[{type_name}]", partial(encode_message, message)
+        yield f"decode_message[{type_name}]", partial(decode_message, wire_data)
+
+    new_message = {
+        key: value
+        for key, value in samples[MessageType.program.value].items()
+        if key not in ("item_content", "item_hash")
+    }
+    yield "add_item_content_and_hash", lambda: add_item_content_and_hash(new_message)
+    yield "create_new_message", lambda: create_new_message(new_message)
+    post_content = samples[MessageType.post.value]["content"]
+    yield "dump_canonical_json[post]", partial(dump_canonical_json, post_content)
+
+    yield "ItemHash[storage]", lambda: ItemHash(STORAGE_HASH)
+    yield "ItemHash[cidv0]", lambda: ItemHash(CIDV0_HASH)
+    yield "ItemHash[cidv1]", lambda: ItemHash(CIDV1_HASH)
+
+    program_message = parse_message(samples[MessageType.program.value])
+    assert isinstance(program_message, ProgramMessage)
+    program_content = program_message.content
+    yield "HashableModel.__hash__[ProgramContent]", lambda: hash(program_content)
+    frozen_content = program_content.model_copy(deep=True).freeze()
+    yield "HashableModel.__hash__[frozen ProgramContent]", lambda: hash(frozen_content)
+
+    page = synthetic_messages(page_size)
+    response = messages_response(page)
+    response_json = json.dumps(response).encode()
+    yield (
+        f"MessagesResponse.model_validate[{page_size}]",
+        lambda: MessagesResponse.model_validate(response),
+    )
+    yield (
+        f"MessagesResponse.model_validate_json[{page_size}]",
+        lambda: MessagesResponse.model_validate_json(response_json),
+    )
+    yield f"parse_messages[{page_size}]", lambda: parse_messages(page)
+
+
+def run_benchmark(
+    name: str,
+    function: Callable[[], object],
+    repeat: int = 5,
+    loops: Optional[int] = None,
+) -> BenchmarkResult:
+    """Time `function`, calling it enough times to last at least 0.2 seconds
+    per measurement unless `loops` is given."""
+    timer = timeit.Timer(function)
+    if loops is None:
+        loops, _ = timer.autorange()
+    times = [total / loops for total in timer.repeat(repeat=repeat, number=loops)]
+    return BenchmarkResult(
+        name=name, loops=loops, best=min(times), mean=sum(times) / len(times)
+    )
+
+
+def run_benchmarks(
+    pattern: str = "",
+    repeat: int = 5,
+    loops: Optional[int] = None,
+    page_size: int = 1000,
+) -> List[BenchmarkResult]:
+    """Run the benchmarks whose name contains `pattern`."""
+    return [
+        run_benchmark(name, function, repeat=repeat, loops=loops)
+        for name, function in iter_benchmarks(page_size=page_size)
+        if pattern in name
+    ]
@@ -0,0 +1,29 @@
+import argparse
+from typing import List, Optional
+
+from . import iter_benchmarks, run_benchmark
+
+
+def main(args: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m aleph_message.benchmarks",
+        description="Benchmark the message models, printing results as JSON lines.",
+    )
+    parser.add_argument(
+        "pattern", nargs="?", default="", help="Only run benchmarks matching"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--loops", type=int, default=None, help="Calls per measurement")
+    parser.add_argument("--page-size", type=int, default=1000, help="Messages per page")
+    arguments = parser.parse_args(args)
+
+    for name, function in iter_benchmarks(page_size=arguments.page_size):
+        if arguments.pattern in name:
+            result = run_benchmark(
+                name, function, repeat=arguments.repeat, loops=arguments.loops
+            )
+            print(result.to_json(), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Messages used by the benchmarks.
+
+The corpus combines the JSON fixtures of the test suite, which cover the
+PROGRAM, INSTANCE and FORGET message types, with synthetic POST, AGGREGATE and
+STORE messages generated from a fixed seed.
+"""
+
+import json
+import random
+from hashlib import sha256
+from pathlib import Path
+from typing import Dict, List
+
+from ..models import MessageType, add_item_content_and_hash
+
+FIXTURES_PATH = Path(__file__).parent.parent / "tests" / "messages"
+
+SENDER = "0x101d8D16372dBf5f1614adaE95Ee5CCE61998Fc9"
+
+
+def fixture_messages() -> List[Dict]:
+    """Messages from the JSON fixtures of the test suite, with their item hash."""
+    messages = []
+    for path in sorted(FIXTURES_PATH.glob("*.json")):
+        message_dict = add_item_content_and_hash(json.loads(path.read_text()))
+        message_dict.pop("_id", None)
+        messages.append(message_dict)
+    return messages
+
+
+def _random_hash(rng: random.Random) -> str:
+    return sha256(rng.getrandbits(256).to_bytes(32, "big")).hexdigest()
+
+
+def _synthetic_content(message_type: MessageType, rng: random.Random) -> Dict:
+    content: Dict = {"address": SENDER, "time": 1625652287.017 + rng.random()}
+    if message_type == MessageType.post:
+        content["type"] = "benchmark"
+        content["content"] = {
+            "body": "x" * rng.randint(10, 1000),
+            "tags": [f"tag-{i}" for i in range(rng.randint(0, 10))],
+        }
+    elif message_type == MessageType.aggregate:
+        content["key"] = "benchmark"
+        content["content"] = {
+            f"key-{i}": rng.randint(0, 2**32) for i in range(rng.randint(1, 50))
+        }
+    elif message_type == MessageType.store:
+        content["item_type"] = "storage"
+        content["item_hash"] = _random_hash(rng)
+    else:
+        raise ValueError(f"No synthetic content for {message_type}")
+    return content
+
+
+def synthetic_message(message_type: MessageType, rng: random.Random) -> Dict:
+    """A POST, AGGREGATE or STORE message with random content."""
+    return add_item_content_and_hash(
+        {
+            "chain": "ETH",
+            "sender": SENDER,
+            "type": message_type.value,
+            "channel": "BENCHMARK",
+            "time": 1625652287.017 + rng.random(),
+            "item_type": "inline",
+            "content": _synthetic_content(message_type, rng),
+            "signature": "0x" + _random_hash(rng),
+        }
+    )
+
+
+def synthetic_messages(count: int, seed: int = 0) -> List[Dict]:
+    """A mix of `count` synthetic POST, AGGREGATE and STORE messages."""
+    rng = random.Random(seed)
+    message_types = (MessageType.post, MessageType.aggregate, MessageType.store)
+    return [
+        synthetic_message(message_types[index % len(message_types)], rng)
+        for index in range(count)
+    ]
+
+
+def messages_response(messages: List[Dict]) -> Dict:
+    """A `messages.json` API response containing the given messages."""
+    return {
+        "messages": messages,
+        "pagination_page": 1,
+        "pagination_total": len(messages),
+        "pagination_per_page": len(messages),
+        "pagination_item": "messages",
+    }
@@ -0,0 +1,321 @@
+"""Validation of large archives of messages over multiple processes.
+
+Archives are either directories of pages as saved by
+`aleph_message.tests.download_messages`, where each file is a `messages.json`
+response of the API, or streams of newline-delimited JSON messages.
+
+Usage:
+
+    python -m aleph_message.bulk ./test_messages --workers 32
+    zcat messages.ndjson.gz | python -m aleph_message.bulk -
+
+Failures are written to the standard output as JSON lines, in the order of
+the input, and a summary is written to the standard error at the end.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from pydantic import ValidationError
+
+from .models import ValidationLevel, parse_messages
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+@dataclass
+class ValidationFailure:
+    """A message of the archive that failed validation."""
+
+    source: str
+    """Page file or stream the message was read from"""
+    index: int
+    """Position of the message in its source, or -1 for an invalid page"""
+    item_hash: Optional[str]
+    errors: List[Dict[str, Any]]
+
+
+@dataclass
+class ChunkResult:
+    """Result of the validation of a chunk of the archive by a worker."""
+
+    source: str
+    messages: int
+    failures: List[ValidationFailure] = field(default_factory=list)
+
+
+@dataclass
+class ValidationSummary:
+    """Number of messages and failures of a validation run."""
+
+    messages: int = 0
+    failures: int = 0
+    seconds: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Messages validated per second"""
+        return self.messages / self.seconds if self.seconds else 0.0
+
+    def add(self, result: ChunkResult) -> None:
+        self.messages += result.messages
+        self.failures += len(result.failures)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "throughput": self.throughput}
+
+
+def _error_details(error: ValidationError) -> List[Dict[str, Any]]:
+    """Error details that can be sent back from a worker process."""
+    return [
+        {"type": detail["type"], "loc": detail["loc"], "msg": detail["msg"]}
+        for detail in error.errors(include_url=False)
+    ]
+
+
+def _validate_dicts(
+    source: str,
+    message_dicts: Sequence[Any],
+    indexes: Sequence[int],
+    validation_level: ValidationLevel,
+) -> List[ValidationFailure]:
+    _, errors = parse_messages(message_dicts, validation_level)
+    return [
+        ValidationFailure(
+            source=source,
+            index=indexes[error.index],
+            item_hash=error.item_hash,
+            errors=_error_details(error.error),
+        )
+        for error in errors
+    ]
+
+
+def _invalid_page(source: str, error: Dict[str, Any]) -> ChunkResult:
+    failure = ValidationFailure(source=source, index=-1, item_hash=None, errors=[error])
+    return ChunkResult(source=source, messages=0, failures=[failure])
+
+
+def validate_page(
+    path: Union[str, Path], validation_level: ValidationLevel = ValidationLevel.full
+) -> ChunkResult:
+    """Validate the messages of a page file.
+
+    A file that is not a `messages.json` response is reported as a single
+    failure, with an index of -1.
+    """
+    source = str(path)
+    try:
+        with open(path, "rb") as page_fd:
+            page = json.load(page_fd)
+    except ValueError as error:
+        return _invalid_page(
+            source, {"type": "json_invalid", "loc": (), "msg": str(error)}
+        )
+    if not isinstance(page, dict) or "messages" not in page:
+        return _invalid_page(
+            source, {"type": "missing", "loc": ("messages",), "msg": "Field required"}
+        )
+    message_dicts = page["messages"]
+    if not isinstance(message_dicts, list):
+        return _invalid_page(
+            source,
+            {
+                "type": "list_type",
+                "loc": ("messages",),
+                "msg": "Input should be a valid list",
+            },
+        )
+    failures = _validate_dicts(
+        source, message_dicts, range(len(message_dicts)), validation_level
+    )
+    return ChunkResult(source=source, messages=len(message_dicts), failures=failures)
+
+
+def validate_lines(
+    source: str,
+    first_index: int,
+    lines: Sequence[Union[bytes, str]],
+    validation_level: ValidationLevel = ValidationLevel.full,
+) -> ChunkResult:
+    """Validate a chunk of JSON lines, starting at line `first_index` of `source`.
+
+    Blank lines are skipped, and are not counted as messages.
+    """
+    message_dicts: List[Any] = []
+    indexes: List[int] = []
+    failures: List[ValidationFailure] = []
+    messages = 0
+    for index, line in enumerate(lines, start=first_index):
+        if not line.strip():
+            continue
+        messages += 1
+        try:
+            message_dicts.append(json.loads(line))
+            indexes.append(index)
+        except json.JSONDecodeError as error:
+            failures.append(
+                ValidationFailure(
+                    source=source,
+                    index=index,
+                    item_hash=None,
+                    errors=[{"type": "json_invalid", "loc": (), "msg": str(error)}],
+                )
+            )
+
+    failures.extend(_validate_dicts(source, message_dicts, indexes, validation_level))
+    failures.sort(key=lambda failure: failure.index)
+    return ChunkResult(source=source, messages=messages, failures=failures)
+
+
+def list_page_files(directory: Union[str, Path]) -> List[Path]:
+    """Page files of a directory, in the order of their page number."""
+
+    def page_number(path: Path) -> Tuple[int, Union[int, str]]:
+        return (0, int(path.stem)) if path.stem.isdigit() else (1, path.stem)
+
+    return sorted(Path(directory).glob("*.json"), key=page_number)
+
+
+def _run_ordered(
+    tasks: Iterable[Tuple[Callable[..., ChunkResult], Tuple]],
+    executor: Optional[Executor],
+    max_pending: int,
+) -> Iterator[ChunkResult]:
+    """Run tasks on the executor and yield their results in submission order.
+
+    At most `max_pending` tasks are submitted at once, so that the input is
+    read as the validation progresses.
+    """
+    if executor is None:
+        for function, args in tasks:
+            yield function(*args)
+        return
+
+    pending: Deque[Future] = deque()
+    for function, args in tasks:
+        pending.append(executor.submit(function, *args))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _iter_line_chunks(
+    lines: Iterable[Union[bytes, str]], chunk_size: int
+) -> Iterator[Tuple[int, List[Union[bytes, str]]]]:
+    # Blank lines are kept, so that indexes are the numbers of the lines
+    iterator = iter(lines)
+    first_index = 0
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield first_index, chunk
+        first_index += len(chunk)
+
+
+def validate_archive(
+    source: Union[str, Path, Iterable[Union[bytes, str]]],
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    validation_level: ValidationLevel = ValidationLevel.full,
+) -> Iterator[ChunkResult]:
+    """Validate an archive of messages over a pool of `workers` processes.
+
+    `source` is a directory of page files, a single page file, or an iterable
+    of JSON lines, which is validated by chunks of `chunk_size` messages.
+    Results are yielded in the order of the input. With a single worker, the
+    validation runs in the current process.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    tasks: Iterator[Tuple[Callable[..., ChunkResult], Tuple]]
+    if isinstance(source, (str, Path)):
+        path = Path(source)
+        paths = list_page_files(path) if path.is_dir() else [path]
+        tasks = ((validate_page, (page, validation_level)) for page in paths)
+    else:
+        tasks = (
+            (validate_lines, ("<stream>", first_index, chunk, validation_level))
+            for first_index, chunk in _iter_line_chunks(source, chunk_size)
+        )
+
+    if workers == 1:
+        yield from _run_ordered(tasks, executor=None, max_pending=1)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from _run_ordered(tasks, executor, max_pending=workers * 2)
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m aleph_message.bulk",
+        description="Validate an archive of Aleph messages on multiple processes.",
+    )
+    parser.add_argument(
+        "source",
+        help="Directory of page files, page file, or '-' to read JSON lines "
+        "from the standard input",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Number of worker processes"
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="Number of JSON lines validated per task",
+    )
+    parser.add_argument(
+        "--validation-level",
+        type=ValidationLevel,
+        choices=list(ValidationLevel),
+        default=ValidationLevel.full,
+    )
+    arguments = parser.parse_args(args)
+
+    source: Union[str, Iterable[bytes]] = (
+        sys.stdin.buffer if arguments.source == "-" else arguments.source
+    )
+
+    summary = ValidationSummary()
+    start = time.perf_counter()
+    for result in validate_archive(
+        source,
+        workers=arguments.workers,
+        chunk_size=arguments.chunk_size,
+        validation_level=arguments.validation_level,
+    ):
+        summary.add(result)
+        for failure in result.failures:
+            print(json.dumps(asdict(failure)))
+    summary.seconds = time.perf_counter() - start
+
+    print(json.dumps(summary.to_dict()), file=sys.stderr)
+    return 1 if summary.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Stable integer codes of the enums of messages.
+
+Compact representations of messages, such as the binary encoding of
+`aleph_message.wire` and the columns of `aleph_message.columns`, store enums
+as their position in these tuples. The codes do not depend on the order of
+the members of the enums: new values are appended, and existing ones are
+never removed nor reordered.
+"""
+
+from typing import Dict, Tuple
+
+from .models.base import Chain, HashType, MessageType
+from .models.item_hash import ItemType
+
+CHAINS: Tuple[Chain, ...] = tuple(
+    Chain(value)
+    for value in (
+        "ARB",
+        "AURORA",
+        "AVAX",
+        "BASE",
+        "BLAST",
+        "BOB",
+        "BSC",
+        "CSDK",
+        "CYBER",
+        "DOT",
+        "ES",
+        "ETH",
+        "ETHERLINK",
+        "FRAX",
+        "HYPE",
+        "INK",
+        "LENS",
+        "LINEA",
+        "LISK",
+        "METIS",
+        "MODE",
+        "NEO",
+        "NULS",
+        "NULS2",
+        "OP",
+        "POL",
+        "SOL",
+        "STT",
+        "SONIC",
+        "TEZOS",
+        "UNICHAIN",
+        "WLD",
+        "ZORA",
+    )
+)
+MESSAGE_TYPES: Tuple[MessageType, ...] = tuple(
+    MessageType(value)
+    for value in ("POST", "AGGREGATE", "STORE", "PROGRAM", "INSTANCE", "FORGET")
+)
+ITEM_TYPES: Tuple[ItemType, ...] = tuple(
+    ItemType(value) for value in ("inline", "storage", "ipfs")
+)
+HASH_TYPES: Tuple[HashType, ...] = (HashType.sha256,)
+
+CHAIN_CODES: Dict[Chain, int] = {chain: code for code, chain in enumerate(CHAINS)}
+MESSAGE_TYPE_CODES: Dict[MessageType, int] = {
+    message_type: code for code, message_type in enumerate(MESSAGE_TYPES)
+}
+ITEM_TYPE_CODES: Dict[ItemType, int] = {
+    item_type: code for code, item_type in enumerate(ITEM_TYPES)
+}
+HASH_TYPE_CODES: Dict[HashType, int] = {
+    hash_type: code for code, hash_type in enumerate(HASH_TYPES)
+}
@@ -0,0 +1,166 @@
+"""Columnar export of batches of messages to NumPy arrays.
+
+Aggregations over many messages, such as counts per chain and type or the
+storage used per sender, are much faster on arrays than on message objects:
+
+    columns = messages_to_columns(messages)
+    counts = numpy.bincount(columns.chain, minlength=len(CHAIN_CATEGORIES))
+    storage = numpy.bincount(columns.sender.codes, weights=columns.size.clip(0))
+
+Enums are exported as small integer codes, their position in the
+`*_CATEGORIES` tuples, which are stable across versions, and strings are
+dictionary-encoded. NumPy is required,
+see the `numpy` extra.
+"""
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .codes import (
+    CHAIN_CODES,
+    CHAINS,
+    ITEM_TYPE_CODES,
+    ITEM_TYPES,
+    MESSAGE_TYPE_CODES,
+    MESSAGE_TYPES,
+)
+from .models import AlephMessage
+from .models.item_hash import DIGEST_SIZE, STORAGE_HASH_LENGTH, ItemHash, pack_digests
+from .projection import MessageProjection
+from .utils import import_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Values of the category codes of enum columns, by code. Codes are the ones
+# of `aleph_message.codes`, which do not change when values are added to the
+# enums.
+CHAIN_CATEGORIES = CHAINS
+MESSAGE_TYPE_CATEGORIES = MESSAGE_TYPES
+ITEM_TYPE_CATEGORIES = ITEM_TYPES
+
+# Fields of raw message dicts that are exported, validated without the rest
+# of the message.
+_projection = MessageProjection(
+    {"chain", "type", "item_type", "time", "size", "item_hash", "sender", "channel"}
+)
+
+
+@dataclass(eq=False)
+class DictionaryColumn:
+    """Dictionary-encoded column of optional strings."""
+
+    codes: "np.ndarray"
+    """Position of the value of each row in `values`, or -1 for None, as int32"""
+    values: List[str]
+    """Distinct values, in order of first appearance"""
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def decode(self) -> List[Optional[str]]:
+        """Value of each row."""
+        values: List[Optional[str]] = [*self.values, None]
+        return [values[code] for code in self.codes.tolist()]
+
+
+@dataclass(eq=False)
+class MessageColumns:
+    """Columns of a batch of messages, with a row per message."""
+
+    chain: "np.ndarray"
+    """Codes of `CHAIN_CATEGORIES`, as int8"""
+    type: "np.ndarray"
+    """Codes of `MESSAGE_TYPE_CATEGORIES`, as int8"""
+    item_type: "np.ndarray"
+    """Codes of `ITEM_TYPE_CATEGORIES`, as int8"""
+    time: "np.ndarray"
+    """Unix timestamps, as float64"""
+    size: "np.ndarray"
+    """Sizes of the contents, or -1 when unknown, as int64"""
+    item_hash: "np.ndarray"
+    """SHA-256 digests of the item hashes as a `(n, 32)` array of uint8, see
+    `ItemHash.digest`"""
+    sender: DictionaryColumn
+    channel: DictionaryColumn
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+
+def _dictionary_encode(numpy: Any, values: Iterable[Optional[str]]) -> DictionaryColumn:
+    positions: Dict[str, int] = {}
+    codes = [
+        -1 if value is None else positions.setdefault(value, len(positions))
+        for value in values
+    ]
+    return DictionaryColumn(
+        codes=numpy.array(codes, dtype=numpy.int32), values=list(positions)
+    )
+
+
+def _pack_item_hashes(numpy: Any, item_hashes: List[str]) -> "np.ndarray":
+    if all(len(item_hash) == STORAGE_HASH_LENGTH for item_hash in item_hashes):
+        packed = pack_digests(item_hashes)
+    else:
+        packed = b"".join(ItemHash(item_hash).digest for item_hash in item_hashes)
+    return numpy.frombuffer(packed, dtype=numpy.uint8).reshape(-1, DIGEST_SIZE)
+
+
+def _row(message: Union[AlephMessage, Dict[str, Any]]) -> Tuple[Any, ...]:
+    if isinstance(message, dict):
+        record = _projection.parse(message)
+        return (
+            record["chain"],
+            record["type"],
+            record["item_type"],
+            record["time"],
+            record.get("size"),
+            record["item_hash"],
+            record["sender"],
+            record.get("channel"),
+        )
+    return (
+        message.chain,
+        message.type,
+        message.item_type,
+        message.time,
+        message.size,
+        message.item_hash,
+        message.sender,
+        message.channel,
+    )
+
+
+def messages_to_columns(
+    messages: Iterable[Union[AlephMessage, Dict[str, Any]]],
+) -> MessageColumns:
+    """Columns of a batch of parsed messages or raw message dicts.
+
+    Only the exported fields of raw dicts are validated, see
+    `MessageProjection`. Raises a `ValidationError` for invalid dicts, and a
+    `ValueError` for IPFS item hashes that are not SHA-256 CIDs.
+    """
+    numpy = import_numpy()
+    rows = [_row(message) for message in messages]
+    chains, types, item_types, times, sizes, item_hashes, senders, channels = (
+        zip(*rows) if rows else ((),) * 8
+    )
+    return MessageColumns(
+        chain=numpy.array([CHAIN_CODES[chain] for chain in chains], dtype=numpy.int8),
+        type=numpy.array(
+            [MESSAGE_TYPE_CODES[message_type] for message_type in types],
+            dtype=numpy.int8,
+        ),
+        item_type=numpy.array(
+            [ITEM_TYPE_CODES[item_type] for item_type in item_types],
+            dtype=numpy.int8,
+        ),
+        time=numpy.array([time.timestamp() for time in times], dtype=numpy.float64),
+        size=numpy.array(
+            [-1 if size is None else size for size in sizes], dtype=numpy.int64
+        ),
+        item_hash=_pack_item_hashes(numpy, list(item_hashes)),
+        sender=_dictionary_encode(numpy, senders),
+        channel=_dictionary_encode(numpy, channels),
+    )
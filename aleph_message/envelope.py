@@ -0,0 +1,93 @@
+"""Lightweight view of the envelope of messages.
+
+Routing, indexing and deduplication of messages only need the fields of
+their envelope. Parsing the whole message for them validates the content as
+well, which takes most of the time for large contents. A `MessageEnvelope`
+only validates the fields of the envelope, and is upgraded to the full
+message when the content is needed.
+"""
+
+import datetime
+from typing import Annotated, Any, Dict, Optional, Union
+
+from pydantic import Field, TypeAdapter
+from typing_extensions import NotRequired, TypedDict
+
+from .models import (
+    MAX_CHANNEL_LENGTH,
+    AlephMessage,
+    Chain,
+    ItemHash,
+    MessageType,
+    ValidationLevel,
+    parse_message,
+    parse_message_json,
+)
+
+
+class _EnvelopeFields(TypedDict):
+    item_hash: ItemHash
+    type: MessageType
+    sender: str
+    chain: Chain
+    channel: NotRequired[Optional[Annotated[str, Field(max_length=MAX_CHANNEL_LENGTH)]]]
+    time: datetime.datetime
+
+
+# Other fields of the messages are ignored, and are not validated.
+_envelope_adapter: TypeAdapter[_EnvelopeFields] = TypeAdapter(_EnvelopeFields)
+
+
+class MessageEnvelope:
+    """Envelope fields of a raw message, validated without its content.
+
+    The raw message is kept as is, so that the full message can be parsed
+    with `upgrade()`.
+    """
+
+    __slots__ = ("item_hash", "type", "sender", "chain", "channel", "time", "_raw")
+
+    item_hash: ItemHash
+    type: MessageType
+    sender: str
+    chain: Chain
+    channel: Optional[str]
+    time: datetime.datetime
+
+    def __init__(
+        self,
+        fields: _EnvelopeFields,
+        raw: Union[Dict[str, Any], bytes, bytearray, str],
+    ):
+        self.item_hash = fields["item_hash"]
+        self.type = fields["type"]
+        self.sender = fields["sender"]
+        self.chain = fields["chain"]
+        self.channel = fields.get("channel")
+        self.time = fields["time"]
+        self._raw = raw
+
+    @classmethod
+    def from_dict(cls, message_dict: Dict[str, Any]) -> "MessageEnvelope":
+        """Envelope of a message dict, raises a `ValidationError` if invalid."""
+        return cls(_envelope_adapter.validate_python(message_dict), message_dict)
+
+    @classmethod
+    def from_json(cls, json_data: Union[bytes, bytearray, str]) -> "MessageEnvelope":
+        """Envelope of a JSON serialized message, raises a `ValidationError` if
+        invalid."""
+        return cls(_envelope_adapter.validate_json(json_data), json_data)
+
+    def upgrade(
+        self, validation_level: ValidationLevel = ValidationLevel.full
+    ) -> AlephMessage:
+        """Parse and validate the whole message."""
+        if isinstance(self._raw, dict):
+            return parse_message(self._raw, validation_level)
+        return parse_message_json(self._raw, validation_level)
+
+    def __repr__(self) -> str:
+        return (
+            f"<{type(self).__name__} {self.type.value} {self.item_hash} "
+            f"from {self.sender} on {self.chain.value}>"
+        )
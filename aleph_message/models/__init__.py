@@ -1,17 +1,59 @@
 import datetime
 import json
 import logging
-from copy import copy
+from contextlib import contextmanager
+from contextvars import ContextVar
+from copy import copy, deepcopy
+from dataclasses import dataclass
 from hashlib import sha256
 from json import JSONDecodeError
 from pathlib import Path
-from typing import Any, Dict, List, Literal, Optional, Type, TypeVar, Union, cast
-
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from typing import (
+    Annotated,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+    cast,
+)
+
+from pydantic import (
+    AfterValidator,
+    BaseModel,
+    ConfigDict,
+    Field,
+    SerializerFunctionWrapHandler,
+    TypeAdapter,
+    ValidationError,
+    ValidationInfo,
+    WrapValidator,
+    create_model,
+    field_validator,
+    model_serializer,
+    model_validator,
+)
+from pydantic_core.core_schema import ValidatorFunctionWrapHandler
 from typing_extensions import TypeAlias
 
-from .abstract import BaseContent, HashableModel
-from .base import Chain, HashType, MessageType
+from ..exceptions import UnknownHashError
+from .abstract import (
+    BaseContent,
+    HashableModel,
+    InternStats,
+    ModelInterner,
+    get_validation_level,
+    is_trusted,
+    validation_context,
+)
+from .base import Chain, HashType, MessageType, ValidationLevel
+from .canonical import hash_item_content
 from .execution.base import MachineType, Payment, PaymentType
 from .execution.instance import InstanceContent
 from .execution.program import ProgramContent
@@ -40,9 +82,12 @@ __all__ = [
     "ItemHash",
     "ItemType",
     "HashableModel",
+    "InternStats",
+    "ModelInterner",
     "MachineType",
     "MessageConfirmation",
     "MessageConfirmationHash",
+    "MessageParsingError",
     "MessageType",
     "Payment",
     "PaymentType",
@@ -53,6 +98,7 @@ __all__ = [
     "ProgramMessage",
     "StoreContent",
     "StoreMessage",
+    "ValidationLevel",
 ]
 
 
@@ -121,7 +167,7 @@ class PostContent(BaseContent):
 
     @field_validator("type")
     def check_type(cls, v, values):
-        if v == "amend":
+        if v == "amend" and not is_trusted(values):
             ref = values.data.get("ref")
             if not ref:
                 raise ValueError("A 'ref' is required for POST type 'amend'")
@@ -158,7 +204,11 @@ class StoreContent(BaseContent):
     )
 
     @field_validator("payment")
-    def check_payment_type(cls, v: Optional[Payment]) -> Optional[Payment]:
+    def check_payment_type(
+        cls, v: Optional[Payment], info: ValidationInfo
+    ) -> Optional[Payment]:
+        if is_trusted(info):
+            return v
         if v is not None and v.type not in (PaymentType.hold, PaymentType.credit):
             raise ValueError(
                 "Only 'hold' and 'credit' payment types are supported for store messages"
@@ -176,7 +226,7 @@ MAX_FORGET_TARGETS = 1000
 MAX_FORGET_REASON_LENGTH = 1000
 
 
-class ForgetContent(BaseContent):
+class ForgetContent(HashableModel, BaseContent):
     """Content of a FORGET message"""
 
     hashes: List[ItemHash] = Field(max_length=MAX_FORGET_TARGETS)
@@ -185,11 +235,77 @@ class ForgetContent(BaseContent):
     )
     reason: Optional[str] = Field(default=None, max_length=MAX_FORGET_REASON_LENGTH)
 
-    def __hash__(self):
-        # Convert List to Tuple for hashing
-        values = copy(self.__dict__)
-        values["hashes"] = tuple(values["hashes"])
-        return hash(self.__class__) + hash(values.values())
+    @field_validator("hashes", "aggregates", mode="before")
+    def classify_hashes(cls, v: Any) -> Any:
+        # Classify all the hashes at once. The list is left as is if it contains
+        # anything else than valid hashes, so that errors refer to the item,
+        # or if it is too long, so that it is rejected before its hashes are
+        # classified.
+        if (
+            isinstance(v, list)
+            and len(v) <= MAX_FORGET_TARGETS
+            and all(isinstance(item, str) for item in v)
+        ):
+            try:
+                return ItemHash.validate_many(v)
+            except UnknownHashError:
+                pass
+        return v
+
+
+# Decoded `item_content` of the inline message being validated, as a tuple
+# `(item_content, decoded)`, shared by the validators of the message so that
+# `item_content` is only decoded once. It is set by `check_item_content` and
+# cleared once the message is validated. The parsing functions validate each
+# message in an `_item_content_scope`, so that it is also dropped when the
+# validation of the message fails.
+_decoded_item_content: ContextVar[Optional[Tuple[str, Any]]] = ContextVar(
+    "decoded_item_content", default=None
+)
+
+
+def _get_decoded_item_content(item_content: str) -> Any:
+    """Returns the decoded `item_content`, decoding it only if not done already."""
+    decoded = _decoded_item_content.get()
+    # Only the string being validated is matched, so that a tree decoded for
+    # another message is never shared.
+    if decoded is not None and decoded[0] is item_content:
+        return decoded[1]
+    decoded_item_content = json.loads(item_content)
+    _decoded_item_content.set((item_content, decoded_item_content))
+    return decoded_item_content
+
+
+@contextmanager
+def _item_content_scope() -> Iterator[None]:
+    """Drops the decoded `item_content` set while validating a message, even
+    if its validation fails."""
+    token = _decoded_item_content.set(None)
+    try:
+        yield
+    finally:
+        _decoded_item_content.reset(token)
+
+
+class _DeferredContent:
+    """Placeholder of the content of a message parsed with `lazy_content`.
+
+    `raw` is the unvalidated content, or None when the content is decoded
+    from `item_content`.
+    """
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw: Any):
+        self.raw = raw
+
+    def __repr__(self) -> str:
+        return "<deferred>"
+
+
+def _is_lazy_content(info: ValidationInfo) -> bool:
+    context = info.context
+    return bool(context and context.get("lazy_content"))
 
 
 class BaseMessage(BaseModel):
@@ -239,14 +355,28 @@ class BaseMessage(BaseModel):
 
     forgotten_by: Optional[List[str]]
 
+    # JSON serialization returned by `dump_bytes`, either the raw JSON the
+    # message was parsed from or its last dump, and the content that is not
+    # validated yet with its validation context, see `_LazyContentMessage`,
+    # which must not add slots to be turned into a message class. Slots are
+    # not part of the fields, so they are ignored by comparisons, copies and
+    # pickling.
+    __slots__ = ("_json_bytes", "_deferred_content")
+
     @field_validator("item_content")
     def check_item_content(cls, v: Optional[str], values) -> Optional[str]:
         item_type = values.data.get("item_type")
         if v is None:
             return None
+        elif is_trusted(values):
+            return v
+        elif item_type == ItemType.inline and _is_lazy_content(values):
+            # Decoded and checked along with the content, on first access.
+            return v
         elif item_type == ItemType.inline:
             try:
-                json.loads(v)
+                # Kept for the other validators of the message
+                _get_decoded_item_content(v)
             except JSONDecodeError:
                 raise ValueError(
                     "Field 'item_content' does not appear to be valid JSON"
@@ -260,6 +390,8 @@ class BaseMessage(BaseModel):
     @field_validator("item_hash")
     def check_item_hash(cls, v: ItemHash, values) -> ItemHash:
         item_type = values.data.get("item_type")
+        if get_validation_level(values) != ValidationLevel.full:
+            return v
         if item_type == ItemType.inline:
             item_content: str = values.data.get("item_content")
 
@@ -286,7 +418,7 @@ class BaseMessage(BaseModel):
     @field_validator("confirmed")
     def check_confirmed(cls, v, values):
         confirmations = values.data.get("confirmations")
-        if v is True and not bool(confirmations):
+        if v is True and not bool(confirmations) and not is_trusted(values):
             raise ValueError("Message cannot be 'confirmed' without 'confirmations'")
         return v
 
@@ -297,12 +429,54 @@ class BaseMessage(BaseModel):
         assert isinstance(v, datetime.datetime)
         return v
 
-    model_config = ConfigDict(extra="forbid")
+    @model_validator(mode="after")
+    def clear_decoded_item_content(self) -> "BaseMessage":
+        if _decoded_item_content.get() is not None:
+            _decoded_item_content.set(None)
+        return self
+
+    @model_validator(mode="after")
+    def clear_json_bytes(self) -> "BaseMessage":
+        # Also run when a field is assigned, see `validate_assignment`
+        object.__setattr__(self, "_json_bytes", None)
+        return self
+
+    model_config = ConfigDict(extra="forbid", validate_assignment=True)
 
     def custom_dump(self):
         """Exclude MongoDB identifiers from dumps for historical reasons."""
         return self.model_dump(exclude={"id_", "_id"})
 
+    def dump_bytes(self) -> bytes:
+        """JSON serialization of the message, without MongoDB identifiers.
+
+        This is the dump of the model, which is computed once and reused
+        until a field of the message is assigned, or the identical raw JSON
+        the message was parsed from if it was kept by `parse_message_json`.
+        Assigned fields are validated, which drops it. Changes made in place
+        to nested values, such as the content, are not detected: assign a
+        new value to the field instead.
+        """
+        json_bytes = getattr(self, "_json_bytes", None)
+        if json_bytes is None:
+            json_bytes = self.model_dump_json(exclude={"id_"}).encode()
+            object.__setattr__(self, "_json_bytes", json_bytes)
+        return json_bytes
+
+    @property
+    def content_loaded(self) -> bool:
+        """Whether the content is validated, see `parse_message`."""
+        return True
+
+    # Not annotated, so that the serialization schema is the one of the fields
+    @model_serializer(mode="wrap")
+    def load_deferred_content(self, handler: SerializerFunctionWrapHandler):
+        # Messages with a deferred content are loaded to be serialized,
+        # including when nested in other models.
+        if isinstance(self, _LazyContentMessage):
+            self._load_content()
+        return handler(self)
+
 
 class PostMessage(BaseMessage):
     """Unique data posts (unique data points, events, ...)"""
@@ -334,7 +508,7 @@ class ForgetMessage(BaseMessage):
     @field_validator("forgotten_by")
     def cannot_be_forgotten(cls, v: Optional[List[str]], values) -> Optional[List[str]]:
         assert values
-        if v:
+        if v and not is_trusted(values):
             raise ValueError("This type of message may not be forgotten")
         return v
 
@@ -348,9 +522,12 @@ class ProgramMessage(BaseMessage):
     def check_content(cls, v, values):
         """Ensure that the content of the message is correctly formatted."""
         item_type = values.data.get("item_type")
-        if item_type == ItemType.inline:
+        if _is_lazy_content(values):
+            # Checked on first access, see `BaseMessage._load_content`
+            return v
+        if item_type == ItemType.inline and not is_trusted(values):
             # Ensure that the content correct JSON
-            item_content = json.loads(values.data.get("item_content"))
+            item_content = _get_decoded_item_content(values.data.get("item_content"))
             # Ensure that the content matches the expected structure
             if v.model_dump(exclude_none=True) != item_content:
                 logger.warning(
@@ -393,17 +570,377 @@ message_classes: List[AlephMessageType] = [
 ExecutableContent: TypeAlias = Union[InstanceContent, ProgramContent]
 ExecutableMessage: TypeAlias = Union[InstanceMessage, ProgramMessage]
 
+# Tagged union over all message classes, discriminated on the `type` field.
+# Building the adapter once compiles a single validator that dispatches on the
+# tag in constant time, whatever the message type.
+_TaggedAlephMessage: TypeAlias = Annotated[AlephMessage, Field(discriminator="type")]
+_message_adapter: TypeAdapter[AlephMessage] = TypeAdapter(_TaggedAlephMessage)
+
+
+class _LazyContentMessage:
+    """Mixin of the messages parsed with `lazy_content`, of which the content
+    is validated on first access.
+
+    The content is left out of `__dict__` until then. Once validated, the
+    message becomes an instance of its message class, see `_load_content`,
+    so that the methods below only apply to messages with a deferred content.
+    Serializations load the content, see `BaseMessage.load_deferred_content`.
+    """
+
+    __slots__ = ()
+
+    # Attributes of `BaseMessage`
+    __dict__: Dict[str, Any]
+    _deferred_content: Tuple[Any, Optional[Dict[str, Any]]]
 
-def parse_message(message_dict: Dict) -> AlephMessage:
-    """Returns the message class corresponding to the type of message."""
-    for message_class in message_classes:
-        message_type: MessageType = MessageType(
-            message_class.__annotations__["type"].__args__[0]
+    @property
+    def content_loaded(self) -> bool:
+        return False
+
+    @property
+    def _message_class(self) -> Type[BaseMessage]:
+        # The bases of lazy message classes are this mixin and the message class
+        return type(self).__bases__[1]
+
+    def _load_content(self) -> None:
+        """Validate the deferred content.
+
+        Errors are raised as a `ValidationError`. The content then stays
+        deferred, so they are raised again on the next access.
+        """
+        raw, context = self._deferred_content
+        validator = self._message_class.__pydantic_validator__
+        token = None
+        if raw is None:
+            item_content = self.__dict__["item_content"]
+            try:
+                raw = json.loads(item_content)
+            except JSONDecodeError:
+                # Raises the error of `check_item_content`
+                validator.validate_assignment(
+                    self, "item_content", item_content, context=context
+                )
+                raise
+            token = _decoded_item_content.set((item_content, raw))
+        try:
+            validator.validate_assignment(self, "content", raw, context=context)
+        finally:
+            if token is not None:
+                _decoded_item_content.reset(token)
+        self._to_message_class()
+
+    def _to_message_class(self) -> None:
+        message_class = self._message_class
+        object.__setattr__(self, "__class__", message_class)
+        object.__setattr__(self, "_deferred_content", None)
+        # Dumps follow the order of `__dict__`, restore the order of the fields.
+        values = self.__dict__
+        ordered = {name: values[name] for name in message_class.model_fields}
+        values.clear()
+        values.update(ordered)
+
+    def __getattr__(self, name: str) -> Any:
+        # Errors in the content are raised as a `ValidationError`, including
+        # by `hasattr` and `getattr` with a default.
+        if name == "content":
+            self._load_content()
+            return self.__dict__["content"]
+        return super().__getattr__(name)  # type: ignore[misc]
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name != "content":
+            super().__setattr__(name, value)
+            return
+        # The assigned content replaces the deferred one
+        lazy_class = type(self)
+        object.__setattr__(self, "__class__", self._message_class)
+        try:
+            setattr(self, name, value)
+        finally:
+            object.__setattr__(self, "__class__", lazy_class)
+        self._to_message_class()
+
+    # The content is loaded before being used by the methods of pydantic,
+    # which read the fields from `__dict__`, except by the representation of
+    # messages and by comparisons, which do not raise on invalid contents.
+    # Once loaded, the methods of the message class are called again.
+
+    def __eq__(self, other: Any) -> bool:
+        # Both contents are loaded, even if the first one is invalid
+        loaded = [_try_load_content(self), _try_load_content(other)]
+        if all(loaded):
+            return self == other
+        # Invalid contents are compared as they were given
+        return (
+            type(self) is type(other)
+            and self.__dict__ == other.__dict__
+            and not any(loaded)
+            and self._deferred_content[0] == other._deferred_content[0]
         )
-        if message_dict["type"] == message_type:
-            return message_class.model_validate(message_dict)
-    else:
-        raise ValueError(f"Unknown message type {message_dict['type']}")
+
+    def __iter__(self):
+        self._load_content()
+        return iter(self)
+
+    def __repr_args__(self):
+        # The content is not validated to be represented, so that invalid
+        # messages can be logged.
+        args = dict(super().__repr_args__())  # type: ignore[misc]
+        args["content"] = _DeferredContent(self._deferred_content[0])
+        fields = self._message_class.model_fields
+        return [(name, args[name]) for name in fields if name in args]
+
+    def __copy__(self):
+        self._load_content()
+        return copy(self)
+
+    def __deepcopy__(self, memo=None):
+        self._load_content()
+        return deepcopy(self, memo)
+
+    def __reduce_ex__(self, protocol):
+        # Pickled as an instance of the message class
+        self._load_content()
+        return self.__reduce_ex__(protocol)
+
+
+def _try_load_content(message: Any) -> bool:
+    """Load the content of a message if deferred and valid, returns whether
+    it is loaded."""
+    if isinstance(message, _LazyContentMessage):
+        try:
+            message._load_content()
+        except ValidationError:
+            return False
+    return True
+
+
+def _lazy_message_class(message_class: AlephMessageType) -> Type[BaseMessage]:
+    """Model of `message_class` whose content is kept as is, for
+    `lazy_content`."""
+    return create_model(
+        message_class.__name__,
+        __base__=(_LazyContentMessage, message_class),
+        __module__=__name__,
+        content=(Any, message_class.model_fields["content"]),
+    )
+
+
+def _defer_content(message: Any, info: ValidationInfo) -> AlephMessage:
+    """Move the content of a lazy message out of its fields."""
+    raw = message.__dict__.pop("content")
+    if isinstance(raw, _DeferredContent):
+        raw = raw.raw
+    context = dict(info.context or {})
+    del context["lazy_content"]
+    object.__setattr__(message, "_deferred_content", (raw, context or None))
+    return message
+
+
+# Validates the messages without their content, which is validated on first
+# access. The models of the union only differ from the message classes by
+# their content, so errors are the same.
+_lazy_message_classes = tuple(_lazy_message_class(cls) for cls in message_classes)
+_TaggedLazyMessage: Any = Annotated[
+    Union[_lazy_message_classes],  # type: ignore[valid-type]
+    Field(discriminator="type"),
+    AfterValidator(_defer_content),
+]
+_lazy_message_adapter: TypeAdapter[AlephMessage] = TypeAdapter(_TaggedLazyMessage)
+
+
+def _with_content(message_dict: Any, lazy_content: bool) -> Any:
+    """Message dict with the content built from `item_content` if missing,
+    see `parse_message`."""
+    if (
+        not isinstance(message_dict, dict)
+        or "content" in message_dict
+        or message_dict.get("item_type") != ItemType.inline
+    ):
+        return message_dict
+    item_content = message_dict.get("item_content")
+    if not isinstance(item_content, str):
+        return message_dict
+    if lazy_content:
+        return {**message_dict, "content": _DeferredContent(None)}
+    try:
+        content = _get_decoded_item_content(item_content)
+    except JSONDecodeError:
+        # Reported by `check_item_content`
+        return message_dict
+    return {**message_dict, "content": content}
+
+
+def parse_message(
+    message_dict: Dict,
+    validation_level: ValidationLevel = ValidationLevel.full,
+    interner: Optional[ModelInterner] = None,
+    lazy_content: bool = False,
+    content_from_item_content: bool = False,
+) -> AlephMessage:
+    """Returns the message class corresponding to the type of message.
+
+    Errors are raised as a `ValidationError`, with the message type as first
+    element of the error locations.
+
+    With an `interner`, equal execution sub-models of the parsed messages are
+    shared, frozen instances, see `ModelInterner`.
+
+    With `lazy_content`, only the envelope of the message is validated, along
+    with its item hash. The content is validated on its first access, and
+    errors in the content or in `item_content` are raised from there as a
+    `ValidationError`, including by `hasattr(message, "content")`. The
+    representation of the message shows the content as `<deferred>` until
+    it is loaded.
+
+    With `content_from_item_content`, the content of inline messages that
+    have none is built from their `item_content`, instead of being reported
+    as missing.
+    """
+    adapter = _lazy_message_adapter if lazy_content else _message_adapter
+    with _item_content_scope():
+        if content_from_item_content:
+            message_dict = _with_content(message_dict, lazy_content)
+        return adapter.validate_python(
+            message_dict,
+            context=validation_context(validation_level, interner, lazy_content),
+        )
+
+
+def _is_missing_content(error: ValidationError) -> bool:
+    # Locations start with the type of the message
+    return any(
+        line["type"] == "missing" and line["loc"][1:] == ("content",)
+        for line in error.errors()
+    )
+
+
+def parse_message_json(
+    json_data: Union[bytes, bytearray, str],
+    validation_level: ValidationLevel = ValidationLevel.full,
+    keep_raw_json: bool = False,
+    interner: Optional[ModelInterner] = None,
+    lazy_content: bool = False,
+    content_from_item_content: bool = False,
+) -> AlephMessage:
+    """Parse a message from its JSON serialization.
+
+    The JSON is validated natively by pydantic-core, without decoding it into
+    a Python dict first. See `parse_message` for the `interner`,
+    `lazy_content` and `content_from_item_content`. The content of a message
+    is only known to be missing once the JSON is validated, so that messages
+    without a content are decoded and validated again, as a dict, with
+    `content_from_item_content`: it is not faster than `parse_message` for
+    them.
+
+    With `keep_raw_json` and `ValidationLevel.trusted`, the JSON is kept on
+    the message and returned by `dump_bytes`. The caller guarantees that it
+    is the serialization that `dump_bytes` would return, such as a line of
+    an archive written by `MessageArchiveWriter`: it is not checked, except
+    for MongoDB identifiers. `keep_raw_json` is ignored at the other levels.
+    """
+    adapter = _lazy_message_adapter if lazy_content else _message_adapter
+    message: AlephMessage
+    try:
+        with _item_content_scope():
+            message = adapter.validate_json(
+                json_data,
+                context=validation_context(validation_level, interner, lazy_content),
+            )
+    except ValidationError as error:
+        if not content_from_item_content or not _is_missing_content(error):
+            raise
+        message = parse_message(
+            json.loads(json_data),
+            validation_level,
+            interner,
+            lazy_content,
+            content_from_item_content,
+        )
+    if (
+        keep_raw_json
+        and validation_level == ValidationLevel.trusted
+        and message.id_ is None
+    ):
+        json_bytes = json_data.encode() if isinstance(json_data, str) else json_data
+        object.__setattr__(message, "_json_bytes", bytes(json_bytes))
+    return message
+
+
+@dataclass(frozen=True)
+class MessageParsingError:
+    """A message of a batch that failed validation in `parse_messages`."""
+
+    index: int
+    """Position of the message in the batch"""
+    item_hash: Optional[str]
+    """Item hash of the raw message, if it has one"""
+    error: ValidationError
+    """Validation errors, located relatively to the message"""
+
+
+def _capture_validation_error(
+    value: Any, handler: ValidatorFunctionWrapHandler
+) -> Union[AlephMessage, ValidationError]:
+    try:
+        with _item_content_scope():
+            return handler(value)
+    except ValidationError as error:
+        return error
+
+
+# Validates a whole batch in a single call. Invalid messages do not abort the
+# validation of the batch, their error is returned in place of the message.
+_batch_adapter: TypeAdapter[List[Any]] = TypeAdapter(
+    List[Annotated[_TaggedAlephMessage, WrapValidator(_capture_validation_error)]]
+)
+_lazy_batch_adapter: TypeAdapter[List[Any]] = TypeAdapter(
+    List[Annotated[_TaggedLazyMessage, WrapValidator(_capture_validation_error)]]
+)
+
+
+def parse_messages(
+    message_dicts: Iterable[Dict],
+    validation_level: ValidationLevel = ValidationLevel.full,
+    interner: Optional[ModelInterner] = None,
+    lazy_content: bool = False,
+    content_from_item_content: bool = False,
+) -> Tuple[List[AlephMessage], List[MessageParsingError]]:
+    """Parse a batch of messages without stopping at the first invalid one.
+
+    Returns the messages that are valid, in their original order, and the list
+    of errors for the messages that are not. See `parse_message` for the
+    `interner`, `content_from_item_content` and `lazy_content`: with it,
+    messages with an invalid content are only reported on access to their
+    content.
+    """
+    if not isinstance(message_dicts, (list, tuple)):
+        message_dicts = list(message_dicts)
+
+    messages: List[AlephMessage] = []
+    errors: List[MessageParsingError] = []
+    batch = message_dicts
+    adapter = _lazy_batch_adapter if lazy_content else _batch_adapter
+    with _item_content_scope():
+        if content_from_item_content:
+            batch = [
+                _with_content(message_dict, lazy_content) for message_dict in batch
+            ]
+        results = adapter.validate_python(
+            batch, context=validation_context(validation_level, interner, lazy_content)
+        )
+    for index, result in enumerate(results):
+        if isinstance(result, ValidationError):
+            message_dict = message_dicts[index]
+            item_hash = (
+                message_dict.get("item_hash")
+                if isinstance(message_dict, dict)
+                else None
+            )
+            errors.append(MessageParsingError(index, item_hash, result))
+        else:
+            messages.append(result)
+    return messages, errors
 
 
 def add_item_content_and_hash(message_dict: Dict, inplace: bool = False) -> Dict:
@@ -413,9 +950,7 @@ def add_item_content_and_hash(message_dict: Dict, inplace: bool = False) -> Dict
     message_dict["item_content"] = json.dumps(
         message_dict["content"], separators=(",", ":")
     )
-    message_dict["item_hash"] = sha256(
-        message_dict["item_content"].encode()
-    ).hexdigest()
+    message_dict["item_hash"] = hash_item_content(message_dict["item_content"])
     return message_dict
 
 
@@ -427,10 +962,17 @@ def create_new_message(
     Computes the 'item_content' and 'item_hash' fields.
     """
     message_content = add_item_content_and_hash(message_dict)
+    # The hash has just been computed from the content, no need to check it.
     if factory:
-        return cast(T, factory.model_validate(message_content))
+        return cast(
+            T,
+            factory.model_validate(
+                message_content,
+                context=validation_context(ValidationLevel.skip_hash),
+            ),
+        )
     else:
-        return cast(T, parse_message(message_content))
+        return cast(T, parse_message(message_content, ValidationLevel.skip_hash))
 
 
 def create_message_from_json(
@@ -443,9 +985,11 @@ def create_message_from_json(
     message_dict = json.loads(json_data)
     message_content = add_item_content_and_hash(message_dict, inplace=True)
     if factory:
-        return factory.model_validate(message_content)
+        return factory.model_validate(
+            message_content, context=validation_context(ValidationLevel.skip_hash)
+        )
     else:
-        return parse_message(message_content)
+        return parse_message(message_content, ValidationLevel.skip_hash)
 
 
 def create_message_from_file(
@@ -460,15 +1004,17 @@ def create_message_from_file(
         message_dict = decoder.load(fd)
     message_content = add_item_content_and_hash(message_dict, inplace=True)
     if factory:
-        return factory.model_validate(message_content)
+        return factory.model_validate(
+            message_content, context=validation_context(ValidationLevel.skip_hash)
+        )
     else:
-        return parse_message(message_content)
+        return parse_message(message_content, ValidationLevel.skip_hash)
 
 
 class MessagesResponse(BaseModel):
     """Response from an Aleph node API."""
 
-    messages: List[AlephMessage]
+    messages: List[_TaggedAlephMessage]
     pagination_page: int
     pagination_total: int
     pagination_per_page: int
@@ -1,26 +1,233 @@
-from pydantic import BaseModel, ConfigDict, Field
+import json
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Any, ClassVar, Dict, FrozenSet, Optional, TypeVar
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    ValidationError,
+    ValidationInfo,
+    model_validator,
+)
+from typing_extensions import Self
+
+from .base import ValidationLevel
 
 # Unix timestamp upper bound (year 2262). Well below the float-precision
 # cliff at 2**53 while still leaving headroom for any realistic message.
 MAX_CONTENT_TIME = 9_223_372_036.0
 
 
+def validation_context(
+    validation_level: ValidationLevel,
+    interner: Optional["ModelInterner"] = None,
+    lazy_content: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """Returns the validation context to use for the given validation level,
+    the interner of the models being validated, if any, and whether the
+    content of messages is validated on first access."""
+    context: Dict[str, Any] = {}
+    if validation_level != ValidationLevel.full:
+        context["validation_level"] = validation_level
+    if interner is not None:
+        context["interner"] = interner
+    if lazy_content:
+        context["lazy_content"] = True
+    return context or None
+
+
+def get_validation_level(info: ValidationInfo) -> ValidationLevel:
+    """Returns the validation level from the context of a validator."""
+    if info.context:
+        return ValidationLevel(
+            info.context.get("validation_level", ValidationLevel.full)
+        )
+    return ValidationLevel.full
+
+
+def is_trusted(info: ValidationInfo) -> bool:
+    """Whether the checks of validators can be skipped."""
+    context = info.context
+    if not context:
+        return False
+    return context.get("validation_level") == ValidationLevel.trusted
+
+
 def hashable(obj):
-    """Convert `obj` into a hashable object."""
-    if isinstance(obj, list):
+    """Convert `obj` into a hashable object, recursively."""
+    if isinstance(obj, (list, tuple)):
         # Convert a list to a tuple (hashable)
-        return tuple(obj)
+        return tuple(hashable(item) for item in obj)
     elif isinstance(obj, dict):
         # Convert a dict to a frozenset of items (hashable)
-        return frozenset(obj.items())
+        return frozenset((key, hashable(value)) for key, value in obj.items())
+    elif isinstance(obj, (set, frozenset)):
+        return frozenset(hashable(item) for item in obj)
     return obj
 
 
 class HashableModel(BaseModel):
+    """Model hashed on the values of its fields.
+
+    A model can be frozen with `freeze()`: its hash is then computed once and
+    cached, and assigning its fields raises a `ValidationError`.
+    """
+
+    # Cached hash and fingerprints of frozen models.
+    __slots__ = ("_frozen_hash", "_fingerprints")
+
+    volatile_fields: ClassVar[FrozenSet[str]] = frozenset()
+    """Fields left out of fingerprints computed with `exclude_volatile`"""
+
     def __hash__(self):
+        frozen_hash = getattr(self, "_frozen_hash", None)
+        if frozen_hash is not None:
+            return frozen_hash
         values = tuple(hashable(value) for value in self.__dict__.values())
         return hash(self.__class__) + hash(values)
 
+    def fingerprint(self, exclude_volatile: bool = False) -> str:
+        """Deterministic digest of the model, stable across processes.
+
+        This is the SHA-256 of the name of the model followed by the JSON of
+        its fields that are not None, with sorted keys. It is cached on frozen
+        models.
+        """
+        fingerprints: Optional[Dict[bool, str]] = getattr(self, "_fingerprints", None)
+        if fingerprints is not None and exclude_volatile in fingerprints:
+            return fingerprints[exclude_volatile]
+
+        fields = self.model_dump(
+            mode="json",
+            exclude=set(self.volatile_fields) if exclude_volatile else None,
+            exclude_none=True,
+        )
+        canonical = json.dumps(fields, sort_keys=True, separators=(",", ":"))
+        fingerprint = sha256(f"{type(self).__name__}:{canonical}".encode()).hexdigest()
+        if self.frozen:
+            if fingerprints is None:
+                fingerprints = {}
+                object.__setattr__(self, "_fingerprints", fingerprints)
+            fingerprints[exclude_volatile] = fingerprint
+        return fingerprint
+
+    @property
+    def frozen(self) -> bool:
+        return getattr(self, "_frozen_hash", None) is not None
+
+    def freeze(self) -> Self:
+        """Freeze this model and the hashable models it contains.
+
+        Values such as lists and dicts are not copied, and changing them in
+        place after the model is frozen leaves its cached hash out of date.
+        """
+        if not self.frozen:
+            for value in self.__dict__.values():
+                _freeze_nested(value)
+            object.__setattr__(self, "_frozen_hash", self.__hash__())
+        return self
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if self.frozen:
+            raise ValidationError.from_exception_data(
+                type(self).__name__,
+                [{"type": "frozen_instance", "loc": (name,), "input": value}],
+            )
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name: str) -> None:
+        if self.frozen:
+            raise ValidationError.from_exception_data(
+                type(self).__name__,
+                [{"type": "frozen_instance", "loc": (name,), "input": None}],
+            )
+        super().__delattr__(name)
+
+
+def _freeze_nested(value: Any) -> None:
+    if isinstance(value, HashableModel):
+        value.freeze()
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _freeze_nested(item)
+    elif isinstance(value, dict):
+        for item in value.values():
+            _freeze_nested(item)
+
+
+class InternableModel(HashableModel):
+    """Hashable model of which equal instances can be shared between messages.
+
+    When a `ModelInterner` is given in the validation context, validated
+    instances are replaced by an equal, frozen instance of the interner.
+    """
+
+    @model_validator(mode="after")
+    def intern_instance(self, info: ValidationInfo) -> Self:
+        interner = info.context.get("interner") if info.context else None
+        if interner is None:
+            return self
+        return interner.intern(self)
+
+
+@dataclass
+class InternStats:
+    """Number of instances of a model seen by a `ModelInterner`."""
+
+    requests: int = 0
+    hits: int = 0
+    """Instances replaced by an existing equal instance"""
+
+    @property
+    def unique(self) -> int:
+        return self.requests - self.hits
+
+
+InternableModelT = TypeVar("InternableModelT", bound=InternableModel)
+
+
+class ModelInterner:
+    """Table of shared instances of internable models.
+
+    Pass it to `parse_message` and the other parsing functions, so that equal
+    runtimes, volumes, payments, environments and resources of the parsed
+    messages are the same frozen instance. The interner keeps these
+    instances for as long as it is alive.
+    """
+
+    def __init__(self) -> None:
+        self._instances: Dict[InternableModel, InternableModel] = {}
+        self.stats: Dict[str, InternStats] = {}
+
+    def __len__(self) -> int:
+        return len(self._instances)
+
+    def intern(self, instance: InternableModelT) -> InternableModelT:
+        """Returns the shared instance equal to `instance`, freezing it if new."""
+        stats = self.stats.setdefault(type(instance).__name__, InternStats())
+        stats.requests += 1
+        shared = self._instances.get(instance)
+        if shared is not None:
+            stats.hits += 1
+            return shared  # type: ignore[return-value]
+        instance.freeze()
+        self._instances[instance] = instance
+        return instance
+
+    @property
+    def total(self) -> InternStats:
+        """Stats of all the models together."""
+        return InternStats(
+            requests=sum(stats.requests for stats in self.stats.values()),
+            hits=sum(stats.hits for stats in self.stats.values()),
+        )
+
+    def clear(self) -> None:
+        self._instances.clear()
+        self.stats.clear()
+
 
 class BaseContent(BaseModel):
     """Base template for message content"""
@@ -54,3 +54,23 @@ class MessageType(str, Enum):
     program = "PROGRAM"
     instance = "INSTANCE"
     forget = "FORGET"
+
+
+class ValidationLevel(str, Enum):
+    """How thoroughly messages are validated when parsed.
+
+    full: all the fields of the message are validated, including its item hash.
+    skip_hash: same as `full`, but the item hash is not checked against the
+        item content.
+    trusted: only the structure and types of the fields are validated, while
+        the checks implemented by validators of the models are skipped. Only
+        use it on messages that have already been validated, for example when
+        reading them back from a database.
+
+    The validation level of models is passed in the validation context, as in
+    `PostMessage.model_validate(data, context={"validation_level": "trusted"})`.
+    """
+
+    full = "full"
+    skip_hash = "skip_hash"
+    trusted = "trusted"
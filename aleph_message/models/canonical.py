@@ -0,0 +1,100 @@
+"""Canonical JSON serialization of the content of messages.
+
+The `item_content` of an inline message is the compact JSON serialization of
+its content, as returned by `json.dumps(content, separators=(",", ":"))`, and
+its `item_hash` is the SHA-256 of this serialization.
+
+The functions defined here produce the same serialization chunk by chunk, so
+that it can be hashed and written as it is being encoded, without holding
+copies of the whole serialization both as text and as bytes.
+"""
+
+import json
+from hashlib import sha256
+from io import BytesIO
+from json.encoder import encode_basestring_ascii
+from typing import Any, Iterator, NamedTuple
+
+# Size in bytes of the chunks that are hashed and written at once.
+CHUNK_SIZE = 64 * 1024
+
+# Dicts and lists are serialized item by item down to this depth, deeper
+# values are serialized at once by the C encoder of the `json` module.
+_SPLIT_DEPTH = 3
+
+_encoder = json.JSONEncoder(separators=(",", ":"))
+
+
+class CanonicalJSON(NamedTuple):
+    """Canonical serialization of a content and its hash."""
+
+    data: bytes
+    item_hash: str
+
+
+def _iter_text_chunks(value: Any, depth: int) -> Iterator[str]:
+    if depth and isinstance(value, dict) and value:
+        # Non-string keys are converted by the encoder, leave them to it.
+        if all(isinstance(key, str) for key in value):
+            separator = "{"
+            for key, item in value.items():
+                yield separator + encode_basestring_ascii(key) + ":"
+                yield from _iter_text_chunks(item, depth - 1)
+                separator = ","
+            yield "}"
+            return
+    elif depth and isinstance(value, (list, tuple)) and value:
+        separator = "["
+        for item in value:
+            yield separator
+            yield from _iter_text_chunks(item, depth - 1)
+            separator = ","
+        yield "]"
+        return
+    yield _encoder.encode(value)
+
+
+def iter_canonical_json(content: Any, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Canonical serialization of `content`, in chunks of about `chunk_size` bytes.
+
+    Values nested deeper than a few levels are serialized at once, so a chunk
+    can be larger than `chunk_size`.
+    """
+    parts = []
+    size = 0
+    for text in _iter_text_chunks(content, _SPLIT_DEPTH):
+        parts.append(text)
+        size += len(text)
+        if size >= chunk_size:
+            # The serialization is pure ASCII, as non-ASCII characters are escaped.
+            yield "".join(parts).encode("ascii")
+            parts.clear()
+            size = 0
+    if parts:
+        yield "".join(parts).encode("ascii")
+
+
+def dump_canonical_json(content: Any) -> CanonicalJSON:
+    """Canonical serialization of `content` as bytes, with its hash."""
+    hasher = sha256()
+    output = BytesIO()
+    for chunk in iter_canonical_json(content):
+        hasher.update(chunk)
+        output.write(chunk)
+    return CanonicalJSON(data=output.getvalue(), item_hash=hasher.hexdigest())
+
+
+def hash_canonical_json(content: Any) -> str:
+    """Item hash of `content`, without keeping its serialization."""
+    hasher = sha256()
+    for chunk in iter_canonical_json(content):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def hash_item_content(item_content: str) -> str:
+    """Item hash of a serialized content, encoded to UTF-8 in chunks."""
+    hasher = sha256()
+    for start in range(0, len(item_content), CHUNK_SIZE):
+        hasher.update(item_content[start : start + CHUNK_SIZE].encode())
+    return hasher.hexdigest()
@@ -33,6 +33,8 @@ AuthorizedKey = Annotated[str, Field(max_length=MAX_AUTHORIZED_KEY_LENGTH)]
 class BaseExecutableContent(HashableModel, BaseContent, ABC):
     """Abstract content for execution messages (Instances, Programs)."""
 
+    volatile_fields = frozenset({"time", "address"})
+
     allow_amend: bool = Field(description="Allow amends to update this function")
     metadata: Optional[Dict[str, Any]] = Field(
         default=None,
@@ -3,7 +3,7 @@ from __future__ import annotations
 from enum import Enum
 from typing import Optional
 
-from ..abstract import HashableModel
+from ..abstract import InternableModel
 from ..base import Chain
 
 
@@ -31,7 +31,7 @@ class PaymentType(str, Enum):
     credit = "credit"
 
 
-class Payment(HashableModel):
+class Payment(InternableModel):
     """Payment information for a program execution."""
 
     chain: Optional[Chain] = None
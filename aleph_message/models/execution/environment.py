@@ -4,10 +4,10 @@ import re
 from enum import Enum
 from typing import List, Literal, Optional, Union
 
-from pydantic import ConfigDict, Field, field_validator, model_validator
+from pydantic import ConfigDict, Field, ValidationInfo, field_validator, model_validator
 
 from ...utils import Mebibytes
-from ..abstract import HashableModel
+from ..abstract import HashableModel, InternableModel, is_trusted
 from ..item_hash import ItemHash
 
 MAX_ADDRESS_REGEX_LENGTH = 256
@@ -21,9 +21,9 @@ class Subscription(HashableModel):
     # accepts arbitrary keys. Cap the number of entries so a subscription
     # object can't be padded with hundreds of keys.
     @model_validator(mode="after")
-    def check_subscription_size(self) -> "Subscription":
+    def check_subscription_size(self, info: ValidationInfo) -> "Subscription":
         extra = self.__pydantic_extra__ or {}
-        if len(extra) > MAX_SUBSCRIPTION_ENTRIES:
+        if len(extra) > MAX_SUBSCRIPTION_ENTRIES and not is_trusted(info):
             raise ValueError(
                 f"Subscription has {len(extra)} entries, "
                 f"maximum allowed is {MAX_SUBSCRIPTION_ENTRIES}"
@@ -82,7 +82,7 @@ MAX_MEMORY_MIB = 1024 * 1024  # 1 TiB
 MAX_SECONDS = 10 * 365 * 24 * 3600
 
 
-class MachineResources(HashableModel):
+class MachineResources(InternableModel):
     vcpus: int = Field(default=1, ge=1, le=MAX_VCPUS)
     memory: Mebibytes = Field(default=Mebibytes(128), ge=1, le=MAX_MEMORY_MIB)
     seconds: int = Field(default=1, ge=1, le=MAX_SECONDS)
@@ -135,7 +135,7 @@ class HypervisorType(str, Enum):
     firecracker = "firecracker"
 
 
-class FunctionEnvironment(HashableModel):
+class FunctionEnvironment(InternableModel):
     reproducible: bool = False
     internet: bool = False
     aleph_api: bool = False
@@ -192,7 +192,11 @@ class InstanceEnvironment(HashableModel):
 
     @field_validator("trusted_execution", mode="before")
     def check_hypervisor(cls, v, values):
-        if v and values.data.get("hypervisor") != HypervisorType.qemu:
+        if (
+            v
+            and values.data.get("hypervisor") != HypervisorType.qemu
+            and not is_trusted(values)
+        ):
             raise ValueError("Trusted Execution Environment is only supported for QEmu")
         return v
 
@@ -214,8 +218,10 @@ class NodeRequirements(HashableModel):
     model_config = ConfigDict(extra="forbid")
 
     @field_validator("address_regex")
-    def check_address_regex_compiles(cls, v: Optional[str]) -> Optional[str]:
-        if v is None:
+    def check_address_regex_compiles(
+        cls, v: Optional[str], info: ValidationInfo
+    ) -> Optional[str]:
+        if v is None or is_trusted(info):
             return v
         try:
             re.compile(v)
@@ -2,10 +2,10 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from pydantic import Field, model_validator
+from pydantic import Field, ValidationInfo, model_validator
 from typing_extensions import Self
 
-from aleph_message.models.abstract import HashableModel
+from aleph_message.models.abstract import HashableModel, is_trusted
 
 from .abstract import BaseExecutableContent
 from .base import Payment
@@ -40,8 +40,8 @@ class InstanceContent(BaseExecutableContent):
     )
 
     @model_validator(mode="after")
-    def check_requirements(self) -> Self:
-        if self.requirements:
+    def check_requirements(self, info: ValidationInfo) -> Self:
+        if self.requirements and not is_trusted(info):
             if (
                 self.payment and (self.payment.is_stream or self.payment.is_credit)
             ) and (not self.requirements.node or not self.requirements.node.node_hash):
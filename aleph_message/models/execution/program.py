@@ -4,14 +4,14 @@ from typing import List, Literal, Optional
 
 from pydantic import Field
 
-from ..abstract import HashableModel
+from ..abstract import HashableModel, InternableModel
 from ..item_hash import ItemHash
 from .abstract import BaseExecutableContent
 from .base import Encoding, Interface, MachineType, Payment
 from .environment import FunctionTriggers
 
 
-class FunctionRuntime(HashableModel):
+class FunctionRuntime(InternableModel):
     ref: ItemHash
     use_latest: bool = True
     comment: str
@@ -7,7 +7,7 @@ from typing import Annotated, Literal, Optional, Union
 from pydantic import ConfigDict, Field
 
 from ...utils import Gigabytes, gigabyte_to_mebibyte
-from ..abstract import HashableModel
+from ..abstract import HashableModel, InternableModel
 from ..item_hash import ItemHash
 
 MAX_VOLUME_LABEL_LENGTH = 256
@@ -49,7 +49,7 @@ class EphemeralVolume(AbstractVolume):
         return False
 
 
-class ParentVolume(HashableModel):
+class ParentVolume(InternableModel):
     """
     A reference volume to copy as a persistent volume.
     """
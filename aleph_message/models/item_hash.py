@@ -1,18 +1,94 @@
+import base64
+import bisect
+import math
+import re
+import struct
+from collections import OrderedDict
 from enum import Enum
-from functools import lru_cache
-from typing import Any
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 from pydantic_core import core_schema
 
 from ..exceptions import UnknownHashError
+from ..utils import import_numpy
+
+if TYPE_CHECKING:
+    import numpy as np
 
 # SHA-256 hex digest used as the `storage` item hash.
-_HEX_LOWER = frozenset("0123456789abcdef")
+_HEX_LOWER = "0123456789abcdef"
 # Base58btc excludes 0, O, I and l to avoid visually-ambiguous characters.
-_BASE58BTC = frozenset("123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz")
+_BASE58BTC = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
 # Base32 (RFC 4648, lowercase, no padding), the encoding used by the
 # `bafy` CIDv1 prefix.
-_BASE32_LOWER = frozenset("abcdefghijklmnopqrstuvwxyz234567")
+_BASE32_LOWER = "abcdefghijklmnopqrstuvwxyz234567"
+
+# Hashes are first dispatched on their length, then their prefix and
+# alphabet are checked in a single pass by these patterns.
+# https://docs.ipfs.io/concepts/content-addressing/#identifier-formats
+STORAGE_HASH_LENGTH = 64
+CIDV0_HASH_LENGTHS = range(44, 47)
+CIDV1_HASH_LENGTH = 59
+_STORAGE_HASH = re.compile(f"[{_HEX_LOWER}]{{64}}")
+_CIDV0_HASH = re.compile(f"Qm[{_BASE58BTC}]+")
+_CIDV1_HASH = re.compile(f"bafy[{_BASE32_LOWER}]+")
+_HEX_STRING = re.compile(f"[{_HEX_LOWER}]*")
+
+# Size in bytes of the SHA-256 digest of an item hash.
+DIGEST_SIZE = 32
+# Multihash prefix of SHA-256 digests: hash function code and digest size.
+_SHA256_MULTIHASH_PREFIX = bytes([0x12, DIGEST_SIZE])
+_BASE58BTC_VALUES = {char: value for value, char in enumerate(_BASE58BTC)}
+
+
+class HashClassification(NamedTuple):
+    """Result of `ItemType.classify_many`."""
+
+    item_types: List[Optional["ItemType"]]
+    """Item type of each hash, or None if the hash is invalid"""
+    invalid: List[bool]
+    """Whether each hash is invalid"""
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of the cache of `ItemType.from_hash`."""
+
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+class _ItemTypeCache:
+    """Bounded table of the item type of recently classified hashes.
+
+    Entries are evicted in insertion order once `maxsize` is reached.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.entries: "OrderedDict[str, ItemType]" = OrderedDict()
+
+    def info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.entries))
+
+
+# Disabled by default, see `ItemType.set_cache_size`.
+_item_type_cache: Optional[_ItemTypeCache] = None
 
 
 class ItemType(str, Enum):
@@ -23,24 +99,24 @@ class ItemType(str, Enum):
     ipfs = "ipfs"
 
     @classmethod
-    @lru_cache
     def from_hash(cls, item_hash: str) -> "ItemType":
-        # https://docs.ipfs.io/concepts/content-addressing/#identifier-formats
-        if (
-            item_hash.startswith("Qm")
-            and 44 <= len(item_hash) <= 46
-            and _BASE58BTC.issuperset(item_hash[2:])
-        ):
-            return cls.ipfs
-        if (
-            item_hash.startswith("bafy")
-            and len(item_hash) == 59
-            and _BASE32_LOWER.issuperset(item_hash[4:])
-        ):
-            return cls.ipfs
-        if len(item_hash) == 64 and _HEX_LOWER.issuperset(item_hash):
-            return cls.storage
-        raise UnknownHashError(f"Could not determine hash type: '{item_hash}'")
+        cache = _item_type_cache
+        if cache is None:
+            return _classify_hash(item_hash)
+
+        item_type = cache.entries.get(item_hash)
+        if item_type is not None:
+            cache.hits += 1
+            return item_type
+        cache.misses += 1
+        item_type = _classify_hash(item_hash)
+        if len(cache.entries) >= cache.maxsize:
+            try:
+                cache.entries.popitem(last=False)
+            except KeyError:
+                pass
+        cache.entries[item_hash] = item_type
+        return item_type
 
     @classmethod
     def is_storage(cls, item_hash: str):
@@ -50,25 +126,201 @@ class ItemType(str, Enum):
     def is_ipfs(cls, item_hash: str):
         return cls.from_hash(item_hash) == cls.ipfs
 
+    @classmethod
+    def classify_many(cls, item_hashes: Sequence[str]) -> HashClassification:
+        """Batch counterpart of `from_hash`, that does not raise on invalid hashes.
+
+        When NumPy is installed, the lengths, prefixes and alphabets of
+        batches of at least `_CLASSIFY_MIN_NUMPY_SIZE` hashes are checked at
+        once on an array of characters. Smaller batches are classified one
+        hash at a time, which is faster than creating the arrays.
+        """
+        if len(item_hashes) < _CLASSIFY_MIN_NUMPY_SIZE:
+            return _classify_many_python(item_hashes)
+        try:
+            numpy = import_numpy()
+        except ImportError:
+            return _classify_many_python(item_hashes)
+        return _classify_many_numpy(numpy, item_hashes)
+
+    @staticmethod
+    def set_cache_size(maxsize: int) -> None:
+        """Keep the item type of up to `maxsize` distinct hashes in a table.
+
+        Classifying a hash is cheap, so the table is only worth it when the
+        same hashes are seen over and over. It is disabled by default, and a
+        `maxsize` of 0 disables it again. Changing the size clears the table.
+        """
+        global _item_type_cache
+        if maxsize < 0:
+            raise ValueError("The cache size cannot be negative")
+        _item_type_cache = _ItemTypeCache(maxsize) if maxsize else None
+
+    @staticmethod
+    def cache_info() -> CacheInfo:
+        """Hits and misses of the table enabled by `set_cache_size`."""
+        cache = _item_type_cache
+        return cache.info() if cache else CacheInfo(0, 0, 0, 0)
+
+    @staticmethod
+    def cache_clear() -> None:
+        """Empty the table enabled by `set_cache_size` and reset its statistics."""
+        if _item_type_cache:
+            ItemType.set_cache_size(_item_type_cache.maxsize)
+
+
+def _classify_hash(item_hash: str) -> ItemType:
+    classifier = _HASH_CLASSIFIERS.get(len(item_hash))
+    if classifier is not None and classifier[0](item_hash):
+        return classifier[1]
+    raise UnknownHashError(f"Could not determine hash type: '{item_hash}'")
+
+
+def _classify_many_python(item_hashes: Sequence[str]) -> HashClassification:
+    item_types: List[Optional[ItemType]] = []
+    for item_hash in item_hashes:
+        try:
+            item_types.append(_classify_hash(item_hash))
+        except UnknownHashError:
+            item_types.append(None)
+    return HashClassification(
+        item_types, [item_type is None for item_type in item_types]
+    )
+
+
+# Number of hashes classified at once, to bound the size of temporary arrays.
+_CLASSIFY_CHUNK_SIZE = 1 << 14
+
+# Smallest batch classified with NumPy: below it, creating the arrays costs
+# more than classifying the hashes one by one.
+_CLASSIFY_MIN_NUMPY_SIZE = 256
+
+# Length, prefix, lookup table of the alphabet and item type code of valid
+# hashes, created on first use as NumPy is optional.
+_numpy_hash_checks: Optional[List[Tuple[int, str, Any, int]]] = None
+
+
+def _get_numpy_hash_checks(numpy) -> List[Tuple[int, str, Any, int]]:
+    global _numpy_hash_checks
+    if _numpy_hash_checks is not None:
+        return _numpy_hash_checks
+
+    def lookup_table(alphabet: str):
+        # Code points above 255 are clipped to 255, which is part of no alphabet.
+        table = numpy.zeros(256, dtype=bool)
+        table[list(alphabet.encode())] = True
+        return table
+
+    checks = [
+        (STORAGE_HASH_LENGTH, "", lookup_table(_HEX_LOWER), 1),
+        (CIDV1_HASH_LENGTH, "bafy", lookup_table(_BASE32_LOWER), 2),
+    ]
+    base58_table = lookup_table(_BASE58BTC)
+    checks += [(length, "Qm", base58_table, 2) for length in CIDV0_HASH_LENGTHS]
+    _numpy_hash_checks = checks
+    return checks
+
+
+def _classify_many_numpy(numpy, item_hashes: Sequence[str]) -> HashClassification:
+    checks = _get_numpy_hash_checks(numpy)
+    item_types = (None, ItemType.storage, ItemType.ipfs)
+
+    width = STORAGE_HASH_LENGTH
+    result = HashClassification([], [])
+    for start in range(0, len(item_hashes), _CLASSIFY_CHUNK_SIZE):
+        chunk = item_hashes[start : start + _CLASSIFY_CHUNK_SIZE]
+        lengths = numpy.fromiter(map(len, chunk), dtype=numpy.intp, count=len(chunk))
+        # Fixed-width array of the code points of the hashes. Longer hashes are
+        # truncated, they are rejected based on their length anyway.
+        chars = numpy.array(chunk, dtype=f"<U{width}").view(numpy.uint32)
+        chars = chars.reshape(len(chunk), width)
+
+        codes = numpy.zeros(len(chunk), dtype=numpy.uint8)
+        for length, prefix, table, code in checks:
+            rows = numpy.flatnonzero(lengths == length)
+            if not rows.size:
+                continue
+            candidates = chars[rows, :length]
+            valid = table.take(candidates[:, len(prefix) :], mode="clip").all(axis=1)
+            if prefix:
+                valid &= (candidates[:, : len(prefix)] == list(map(ord, prefix))).all(
+                    axis=1
+                )
+            codes[rows[valid]] = code
+        result.item_types.extend([item_types[code] for code in codes.tolist()])
+        result.invalid.extend((codes == 0).tolist())
+    return result
+
+
+# Pattern matching function and item type of hashes, by length of the hash.
+_HASH_CLASSIFIERS = {
+    STORAGE_HASH_LENGTH: (_STORAGE_HASH.fullmatch, ItemType.storage),
+    CIDV1_HASH_LENGTH: (_CIDV1_HASH.fullmatch, ItemType.ipfs),
+    **{length: (_CIDV0_HASH.fullmatch, ItemType.ipfs) for length in CIDV0_HASH_LENGTHS},
+}
+
 
 class ItemHash(str):
-    item_type: ItemType
+    """Hash of the content of a message, validated on creation.
+
+    Instances have no `__dict__`, so that they take no more memory than the
+    string itself. Their item type is inferred from their length, as hashes
+    of each item type have a different length.
+    """
+
+    __slots__ = ()
 
     # When overriding str, override __new__ instead of __init__.
     def __new__(cls, value: str):
-        item_type = ItemType.from_hash(value)
+        ItemType.from_hash(value)
+        return str.__new__(cls, value)
+
+    @property
+    def item_type(self) -> ItemType:
+        if len(self) == STORAGE_HASH_LENGTH:
+            return ItemType.storage
+        return ItemType.ipfs
+
+    @property
+    def digest(self) -> bytes:
+        """The 32 bytes SHA-256 digest represented by this hash.
+
+        For IPFS hashes, this is the digest of the multihash of the CID.
+        """
+        if len(self) == STORAGE_HASH_LENGTH:
+            return bytes.fromhex(self)
+        if self.startswith("Qm"):
+            multihash = _base58btc_decode(self)
+        else:
+            # Skip the `b` multibase prefix, then the CID version and codec
+            encoded = self[1:].upper()
+            cid = base64.b32decode(encoded + "=" * (-len(encoded) % 8))
+            version, offset = _read_varint(cid, 0)
+            _, offset = _read_varint(cid, offset)
+            if version != 1:
+                raise ValueError(f"Item hash '{self}' is not a CIDv1")
+            multihash = cid[offset:]
+        if (
+            len(multihash) != DIGEST_SIZE + 2
+            or multihash[:2] != _SHA256_MULTIHASH_PREFIX
+        ):
+            raise ValueError(f"Item hash '{self}' is not a SHA-256 CID")
+        return multihash[2:]
 
-        obj = str.__new__(cls, value)
-        obj.item_type = item_type
-        return obj
+    @classmethod
+    def from_digest(cls, digest: bytes) -> "ItemHash":
+        """Storage item hash from its 32 bytes SHA-256 digest."""
+        if len(digest) != DIGEST_SIZE:
+            raise ValueError(f"Expected a digest of {DIGEST_SIZE} bytes")
+        return str.__new__(cls, digest.hex())
 
     @classmethod
     def __get_pydantic_core_schema__(
         cls, source: type[Any], handler: core_schema.ValidatorFunctionWrapHandler
     ) -> core_schema.CoreSchema:
         """Pydantic v2 - Validation Schema"""
-        return core_schema.no_info_after_validator_function(
-            cls.validate, core_schema.str_schema()
+        return core_schema.no_info_wrap_validator_function(
+            cls._validate_wrap, core_schema.str_schema()
         )
 
     @classmethod
@@ -76,6 +328,29 @@ class ItemHash(str):
         """Pydantic v2 - JSON Schema Generation"""
         return {"type": "string"}
 
+    @classmethod
+    def _validate_wrap(
+        cls, v: Any, handler: core_schema.ValidatorFunctionWrapHandler
+    ) -> "ItemHash":
+        # Item hashes are validated on creation, so existing instances such as
+        # the ones returned by `validate_many` do not need to be checked again.
+        if type(v) is cls:
+            return v
+        return cls.validate(handler(v))
+
+    @classmethod
+    def validate_many(cls, values: Sequence[str]) -> List["ItemHash"]:
+        """Batch counterpart of `validate`, see `ItemType.classify_many`.
+
+        Raises `UnknownHashError` for the first invalid hash.
+        """
+        invalid = ItemType.classify_many(values).invalid
+        if any(invalid):
+            raise UnknownHashError(
+                f"Could not determine hash type: '{values[invalid.index(True)]}'"
+            )
+        return [str.__new__(cls, value) for value in values]
+
     @classmethod
     def validate(cls, v: Any) -> "ItemHash":
         if not isinstance(v, str):
@@ -84,3 +359,421 @@ class ItemHash(str):
 
     def __repr__(self) -> str:
         return f"<ItemHash value={super().__repr__()} item_type={self.item_type!r}>"
+
+
+def _base58btc_decode(value: str) -> bytes:
+    number = 0
+    for char in value:
+        number = number * 58 + _BASE58BTC_VALUES[char]
+    # Leading '1' characters encode leading zero bytes
+    zeros = len(value) - len(value.lstrip("1"))
+    return bytes(zeros) + number.to_bytes((number.bit_length() + 7) // 8, "big")
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    """Unsigned varint of the multiformats at `offset` of `data`, and the
+    offset of the byte that follows it."""
+    value = 0
+    # Varints of the multiformats are at most 9 bytes long
+    for shift, byte in enumerate(data[offset : offset + 9]):
+        value |= (byte & 0x7F) << (7 * shift)
+        if byte < 0x80:
+            return value, offset + shift + 1
+    raise ValueError("Invalid varint")
+
+
+def pack_digests(item_hashes: Iterable[str]) -> bytes:
+    """Concatenate the 32 bytes digests of storage item hashes.
+
+    The result holds `DIGEST_SIZE` bytes per hash, in order.
+    """
+    item_hashes = list(item_hashes)
+    joined = "".join(item_hashes)
+    if any(
+        len(item_hash) != STORAGE_HASH_LENGTH for item_hash in item_hashes
+    ) or not _HEX_STRING.fullmatch(joined):
+        raise UnknownHashError("Only storage item hashes can be packed")
+    return bytes.fromhex(joined)
+
+
+def unpack_digests(data: Union[bytes, bytearray, memoryview]) -> List[ItemHash]:
+    """Storage item hashes from concatenated 32 bytes digests."""
+    if len(data) % DIGEST_SIZE:
+        raise ValueError(f"Expected a multiple of {DIGEST_SIZE} bytes")
+    hex_digests = data.hex()
+    length = STORAGE_HASH_LENGTH
+    return [
+        str.__new__(ItemHash, hex_digests[start : start + length])
+        for start in range(0, len(hex_digests), length)
+    ]
+
+
+def digests_to_array(item_hashes: Iterable[str]) -> "np.ndarray":
+    """Digests of storage item hashes as a NumPy `(n, 32)` array of uint8."""
+    numpy = import_numpy()
+    packed = pack_digests(item_hashes)
+    return numpy.frombuffer(packed, dtype=numpy.uint8).reshape(-1, DIGEST_SIZE)
+
+
+def digests_from_array(array: "np.ndarray") -> List[ItemHash]:
+    """Storage item hashes from a NumPy `(n, 32)` array of digests."""
+    numpy = import_numpy()
+    array = numpy.ascontiguousarray(array, dtype=numpy.uint8)
+    if array.ndim != 2 or array.shape[1] != DIGEST_SIZE:
+        raise ValueError(f"Expected an array of shape (n, {DIGEST_SIZE})")
+    return unpack_digests(array.data.cast("B"))
+
+
+# Number of digests added to an `ItemHashSet` before they are sorted in a run.
+_BUFFER_SIZE = 1 << 16
+# Number of digests of a run per entry of its index.
+_BLOCK_SIZE = 256
+
+
+class _DigestRun:
+    """Sorted run of packed digests, with an index of the first digest of each
+    block of `_BLOCK_SIZE` digests.
+
+    The index is searched by bisection, then the block by `bytes.find`, so
+    that lookups do not need to loop over the digests in Python.
+    """
+
+    __slots__ = ("data", "index")
+
+    def __init__(self, data: bytes):
+        self.data = data
+        block_bytes = _BLOCK_SIZE * DIGEST_SIZE
+        self.index = [
+            data[offset : offset + DIGEST_SIZE]
+            for offset in range(0, len(data), block_bytes)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.data) // DIGEST_SIZE
+
+    def __iter__(self) -> Iterator[bytes]:
+        data = self.data
+        for offset in range(0, len(data), DIGEST_SIZE):
+            yield data[offset : offset + DIGEST_SIZE]
+
+    def __contains__(self, digest: bytes) -> bool:
+        block = bisect.bisect_right(self.index, digest) - 1
+        if block < 0:
+            return False
+        start = block * _BLOCK_SIZE * DIGEST_SIZE
+        end = start + _BLOCK_SIZE * DIGEST_SIZE
+        position = self.data.find(digest, start, end)
+        # Ignore matches that are not aligned on a digest.
+        while position != -1 and (position - start) % DIGEST_SIZE:
+            position = self.data.find(digest, position + 1, end)
+        return position != -1
+
+    def bisect(self, digest: bytes) -> int:
+        """Index of the first digest that is not lower than `digest`."""
+        low = max(0, bisect.bisect_right(self.index, digest) - 1) * _BLOCK_SIZE
+        high = min(low + _BLOCK_SIZE, len(self))
+        data = self.data
+        while low < high:
+            middle = (low + high) // 2
+            offset = middle * DIGEST_SIZE
+            if data[offset : offset + DIGEST_SIZE] < digest:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def merge(self, other: "_DigestRun") -> "_DigestRun":
+        """Merge with a run that has no digest in common with this one."""
+        run, other = (self, other) if len(self) >= len(other) else (other, self)
+        try:
+            numpy = import_numpy()
+        except ImportError:
+            pass
+        else:
+            # Fixed-size byte strings are sorted like the bytes of the digests.
+            digests = numpy.frombuffer(run.data, dtype=f"S{DIGEST_SIZE}")
+            others = numpy.frombuffer(other.data, dtype=f"S{DIGEST_SIZE}")
+            merged = numpy.insert(digests, numpy.searchsorted(digests, others), others)
+            return _DigestRun(merged.tobytes())
+
+        # Insert the digests of the smaller run between slices of the larger one.
+        view = memoryview(run.data)
+        parts: List[Union[bytes, memoryview]] = []
+        start = 0
+        for digest in other:
+            position = run.bisect(digest) * DIGEST_SIZE
+            parts += (view[start:position], digest)
+            start = position
+        parts.append(view[start:])
+        return _DigestRun(b"".join(parts))
+
+
+class _BloomFilter:
+    """Bloom filter of SHA-256 digests.
+
+    Digests are uniformly distributed, so the positions of a digest in the
+    filter are read directly from its bytes instead of being hashed again.
+    """
+
+    _positions = struct.Struct("<8I")
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        self.capacity = capacity
+        self.false_positive_rate = false_positive_rate
+        self.size = max(
+            64, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        )
+        self.hash_count = min(8, max(1, round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, digest: bytes) -> bool:
+        """Add a digest, and return whether it may have been added already."""
+        bits = self.bits
+        size = self.size
+        found = True
+        for value in self._positions.unpack(digest)[: self.hash_count]:
+            position = value % size
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                found = False
+        return found
+
+    def add_packed(self, data: bytes) -> None:
+        """Add packed digests, all at once with NumPy if installed."""
+        try:
+            numpy = import_numpy()
+        except ImportError:
+            for digest in _split_digests(data):
+                self.add(digest)
+            return
+        values = numpy.frombuffer(data, dtype="<u4").reshape(-1, DIGEST_SIZE // 4)
+        positions = values[:, : self.hash_count].astype(numpy.uint64) % numpy.uint64(
+            self.size
+        )
+        flags = numpy.zeros(len(self.bits) * 8, dtype=bool)
+        flags[positions.ravel()] = True
+        bits = numpy.frombuffer(self.bits, dtype=numpy.uint8)
+        bits |= numpy.packbits(flags, bitorder="little")
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits = self.bits
+        size = self.size
+        for value in self._positions.unpack(digest)[: self.hash_count]:
+            position = value % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class ItemHashSet:
+    """Set of item hashes that takes little memory, to track the hashes seen.
+
+    Storage hashes are kept as their 32 bytes digest. Digests are added to a
+    buffer, which is sorted in a run of packed digests once full. Runs are
+    searched by bisection and merged together as they grow, so that there
+    are only a few of them. IPFS hashes are expected to be rare and are kept
+    in a regular set.
+
+    A Bloom filter in front of the runs answers most lookups of unseen hashes
+    without searching the runs. It is rebuilt with twice the capacity when
+    more than `capacity` storage hashes have been added.
+    """
+
+    def __init__(
+        self,
+        item_hashes: Iterable[str] = (),
+        capacity: int = 1 << 20,
+        false_positive_rate: float = 0.01,
+    ):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("false_positive_rate must be between 0 and 1")
+        self._runs: List[_DigestRun] = []
+        self._buffer: Set[bytes] = set()
+        self._digest_count = 0
+        self._cids: Set[str] = set()
+        self._bloom = _BloomFilter(capacity, false_positive_rate)
+        self.update(item_hashes)
+
+    def __len__(self) -> int:
+        return self._digest_count + len(self._cids)
+
+    def __contains__(self, item_hash: object) -> bool:
+        if not isinstance(item_hash, str):
+            return False
+        try:
+            item_type = _classify_hash(item_hash)
+        except UnknownHashError:
+            return False
+        if item_type == ItemType.storage:
+            return self._contains_digest(bytes.fromhex(item_hash))
+        return item_hash in self._cids
+
+    def __iter__(self) -> Iterator[ItemHash]:
+        """Iterate over the item hashes of the set, in no particular order."""
+        for digest in self._iter_digests():
+            yield str.__new__(ItemHash, digest.hex())
+        for cid in self._cids:
+            yield str.__new__(ItemHash, cid)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} of {len(self)} item hashes>"
+
+    def add(self, item_hash: str) -> bool:
+        """Add an item hash to the set.
+
+        Returns whether the hash was not already in the set. Raises
+        `UnknownHashError` if the hash is invalid.
+        """
+        if _classify_hash(item_hash) == ItemType.storage:
+            return self._add_digest(bytes.fromhex(item_hash))
+        if item_hash in self._cids:
+            return False
+        self._cids.add(str(item_hash))
+        return True
+
+    def update(self, item_hashes: Iterable[str]) -> None:
+        """Add all the given item hashes to the set."""
+        if isinstance(item_hashes, ItemHashSet):
+            for digest in item_hashes._iter_digests():
+                self._add_digest(digest)
+            self._cids |= item_hashes._cids
+            return
+        for item_hash in item_hashes:
+            self.add(item_hash)
+
+    def copy(self) -> "ItemHashSet":
+        result = ItemHashSet.__new__(ItemHashSet)
+        # Runs are immutable and can be shared between copies.
+        result._runs = list(self._runs)
+        result._buffer = set(self._buffer)
+        result._digest_count = self._digest_count
+        result._cids = set(self._cids)
+        result._bloom = _BloomFilter(
+            self._bloom.capacity, self._bloom.false_positive_rate
+        )
+        result._bloom.bits[:] = self._bloom.bits
+        return result
+
+    def union(self, *others: Iterable[str]) -> "ItemHashSet":
+        """New set with the item hashes of this set and of all the others."""
+        other_sets = [_as_item_hash_set(other) for other in others]
+        digests = _merge_digests(
+            [
+                part
+                for item_hashes in (self, *other_sets)
+                for part in item_hashes._parts()
+            ]
+        )
+        return self._from_digests(
+            digests, self._cids.union(*(other._cids for other in other_sets))
+        )
+
+    def difference(self, *others: Iterable[str]) -> "ItemHashSet":
+        """New set with the item hashes of this set that are in none of the others."""
+        other_sets = [_as_item_hash_set(other) for other in others]
+        digests = _merge_digests(
+            self._parts(), [part for other in other_sets for part in other._parts()]
+        )
+        return self._from_digests(
+            digests, self._cids.difference(*(other._cids for other in other_sets))
+        )
+
+    def __or__(self, other: Iterable[str]) -> "ItemHashSet":
+        return self.union(other)
+
+    def __sub__(self, other: Iterable[str]) -> "ItemHashSet":
+        return self.difference(other)
+
+    def _parts(self) -> List[bytes]:
+        """Packed digests of the set, by run, then of the buffer."""
+        return [run.data for run in self._runs] + [b"".join(self._buffer)]
+
+    def _from_digests(self, digests: bytes, cids: Set[str]) -> "ItemHashSet":
+        """New set of sorted packed `digests` and of `cids`, with the capacity
+        and false positive rate of this set."""
+        result = ItemHashSet(
+            capacity=self._bloom.capacity,
+            false_positive_rate=self._bloom.false_positive_rate,
+        )
+        if digests:
+            result._runs.append(_DigestRun(digests))
+            result._digest_count = len(digests) // DIGEST_SIZE
+        result._cids = cids
+        result._rebuild_bloom_filter(result._bloom.capacity)
+        return result
+
+    def _iter_digests(self) -> Iterator[bytes]:
+        for run in self._runs:
+            yield from run
+        yield from self._buffer
+
+    def _contains_digest(self, digest: bytes) -> bool:
+        return digest in self._bloom and self._search_digest(digest)
+
+    def _search_digest(self, digest: bytes) -> bool:
+        return digest in self._buffer or any(digest in run for run in self._runs)
+
+    def _add_digest(self, digest: bytes) -> bool:
+        if self._bloom.add(digest) and self._search_digest(digest):
+            return False
+        self._buffer.add(digest)
+        self._digest_count += 1
+        if self._digest_count > self._bloom.capacity:
+            self._rebuild_bloom_filter(self._bloom.capacity * 2)
+        if len(self._buffer) >= _BUFFER_SIZE:
+            self._flush_buffer()
+        return True
+
+    def _flush_buffer(self) -> None:
+        self._runs.append(_DigestRun(b"".join(sorted(self._buffer))))
+        self._buffer.clear()
+        # Merge runs until each one is at least twice as large as the next one.
+        while len(self._runs) > 1 and len(self._runs[-2]) < 2 * len(self._runs[-1]):
+            run = self._runs.pop()
+            self._runs[-1] = self._runs[-1].merge(run)
+
+    def _rebuild_bloom_filter(self, capacity: int) -> None:
+        self._bloom = _BloomFilter(
+            max(capacity, self._digest_count), self._bloom.false_positive_rate
+        )
+        for part in self._parts():
+            self._bloom.add_packed(part)
+
+
+def _as_item_hash_set(item_hashes: Iterable[str]) -> ItemHashSet:
+    if isinstance(item_hashes, ItemHashSet):
+        return item_hashes
+    return ItemHashSet(item_hashes)
+
+
+def _split_digests(data: bytes) -> List[bytes]:
+    return [
+        data[offset : offset + DIGEST_SIZE]
+        for offset in range(0, len(data), DIGEST_SIZE)
+    ]
+
+
+def _merge_digests(parts: Sequence[bytes], removed: Sequence[bytes] = ()) -> bytes:
+    """Sorted packed digests of `parts` that are not in `removed`, without
+    duplicates.
+
+    Parts and removed digests are packed digests, in any order. They are
+    merged with NumPy if installed, or with a set otherwise.
+    """
+    try:
+        numpy = import_numpy()
+    except ImportError:
+        digests = set(_split_digests(b"".join(parts)))
+        digests.difference_update(_split_digests(b"".join(removed)))
+        return b"".join(sorted(digests))
+
+    # Fixed-size byte strings are sorted like the bytes of the digests.
+    dtype = f"S{DIGEST_SIZE}"
+    array = numpy.frombuffer(b"".join(parts), dtype=dtype)
+    if not removed:
+        return numpy.unique(array).tobytes()
+    removed_array = numpy.frombuffer(b"".join(removed), dtype=dtype)
+    return numpy.setdiff1d(array, removed_array).tobytes()
@@ -0,0 +1,207 @@
+"""Archives of messages as newline-delimited JSON, plain or gzip-compressed.
+
+Each line of an archive is the JSON serialization of a message, as returned
+by `BaseMessage.dump_bytes`. Archives are written and read in chunks, so
+that memory use does not depend on the size of the archive:
+
+    with MessageArchiveWriter("messages.ndjson.gz") as writer:
+        writer.write_many(messages)
+
+    for message in read_messages("messages.ndjson.gz"):
+        ...
+
+Archives written by the writer can be read with `ValidationLevel.trusted`,
+which skips the checks that already passed when their messages were parsed.
+"""
+
+import gzip
+import io
+from pathlib import Path
+from typing import IO, Iterable, Iterator, List, Optional, Union, cast
+
+from .models import AlephMessage, ValidationLevel, parse_message_json
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+DEFAULT_COMPRESSLEVEL = 6
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+ArchiveTarget = Union[str, Path, IO[bytes]]
+
+
+def _is_gzip_path(path: Union[str, Path]) -> bool:
+    with open(path, "rb") as fd:
+        return fd.read(len(_GZIP_MAGIC)) == _GZIP_MAGIC
+
+
+class MessageArchiveWriter:
+    """Writer of messages to a newline-delimited JSON archive.
+
+    The target is a path or a binary file object. Archives are compressed
+    with gzip if `compress` is set, which defaults to whether a path ends with
+    `.gz`. Lines are written by chunks of about `chunk_size` bytes, the last
+    one when the writer is flushed or closed. File objects given as target are
+    not closed by the writer.
+    """
+
+    def __init__(
+        self,
+        target: ArchiveTarget,
+        compress: Optional[bool] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        compresslevel: int = DEFAULT_COMPRESSLEVEL,
+    ):
+        if isinstance(target, (str, Path)):
+            if compress is None:
+                compress = str(target).endswith(".gz")
+            self._file: IO[bytes] = open(target, "wb")
+            self._owns_file = True
+        else:
+            self._file = target
+            self._owns_file = False
+        self._output: IO[bytes] = self._file
+        if compress:
+            self._output = cast(
+                IO[bytes],
+                gzip.GzipFile(
+                    fileobj=self._file, mode="wb", compresslevel=compresslevel
+                ),
+            )
+        self._chunk_size = chunk_size
+        self._lines: List[bytes] = []
+        self._pending_size = 0
+        self.count = 0
+        """Number of messages written"""
+
+    def write(self, message: AlephMessage) -> None:
+        """Write a message as a line of the archive."""
+        line = message.dump_bytes()
+        if b"\n" in line:
+            # Raw JSON kept by `parse_message_json` may be pretty-printed
+            line = message.model_dump_json(exclude={"id_"}).encode()
+        self._lines.append(line)
+        self._lines.append(b"\n")
+        self._pending_size += len(line) + 1
+        self.count += 1
+        if self._pending_size >= self._chunk_size:
+            self._write_lines()
+
+    def write_many(self, messages: Iterable[AlephMessage]) -> int:
+        """Write messages in order, returns the number of messages written."""
+        count = self.count
+        for message in messages:
+            self.write(message)
+        return self.count - count
+
+    def _write_lines(self) -> None:
+        self._output.write(b"".join(self._lines))
+        self._lines.clear()
+        self._pending_size = 0
+
+    def flush(self) -> None:
+        """Write the pending lines to the target."""
+        if self._lines:
+            self._write_lines()
+        self._output.flush()
+
+    def close(self) -> None:
+        """Write the pending lines and the end of the compressed stream."""
+        if self._output.closed:
+            return
+        self.flush()
+        if self._output is not self._file:
+            self._output.close()
+        if self._owns_file:
+            self._file.close()
+
+    def __enter__(self) -> "MessageArchiveWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_messages(
+    target: ArchiveTarget,
+    messages: Iterable[AlephMessage],
+    compress: Optional[bool] = None,
+) -> int:
+    """Write messages to an archive, returns the number of messages written.
+
+    See `MessageArchiveWriter`.
+    """
+    with MessageArchiveWriter(target, compress=compress) as writer:
+        return writer.write_many(messages)
+
+
+def _iter_chunks(source: IO[bytes], chunk_size: int) -> Iterator[bytes]:
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_lines(
+    source: ArchiveTarget,
+    compressed: Optional[bool] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Non-empty lines of an archive, decompressed and without line ending.
+
+    The source is a path or a binary file object. Whether it is compressed
+    is detected from its first bytes, unless `compressed` is set. File objects
+    given as source are not closed.
+    """
+    if isinstance(source, (str, Path)):
+        if compressed is None:
+            compressed = _is_gzip_path(source)
+        with open(source, "rb") as fd:
+            yield from iter_lines(fd, compressed, chunk_size)
+        return
+
+    stream: IO[bytes] = source
+    if compressed is None:
+        if not hasattr(stream, "peek"):
+            stream = io.BufferedReader(stream)  # type: ignore[type-var]
+        magic = stream.peek(len(_GZIP_MAGIC))  # type: ignore[attr-defined]
+        compressed = magic.startswith(_GZIP_MAGIC)
+    if compressed:
+        stream = cast(IO[bytes], gzip.GzipFile(fileobj=stream, mode="rb"))
+
+    # Parts of the line that spans the end of the last chunk
+    pending: List[bytes] = []
+    for chunk in _iter_chunks(stream, chunk_size):
+        end = chunk.find(b"\n")
+        if end < 0:
+            pending.append(chunk)
+            continue
+        pending.append(chunk[:end])
+        line = b"".join(pending)
+        if line.strip():
+            yield line
+        lines = chunk[end + 1 :].split(b"\n")
+        pending = [lines.pop()]
+        for line in lines:
+            if line.strip():
+                yield line
+    line = b"".join(pending)
+    if line.strip():
+        yield line
+
+
+def read_messages(
+    source: ArchiveTarget,
+    validation_level: ValidationLevel = ValidationLevel.full,
+    compressed: Optional[bool] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[AlephMessage]:
+    """Messages of an archive, parsed one line at a time.
+
+    See `iter_lines` for the source. Invalid messages raise a
+    `ValidationError`, use `ValidationLevel.trusted` for archives written by
+    `MessageArchiveWriter` from validated messages.
+    """
+    for line in iter_lines(source, compressed, chunk_size):
+        yield parse_message_json(line, validation_level)
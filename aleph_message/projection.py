@@ -0,0 +1,240 @@
+"""Partial parsing of messages, limited to the fields that are needed.
+
+Secondary indexes of messages are built from a few fields, such as the item
+hash, the sender or the time, and sometimes from fields of the content.
+A `MessageProjection` validates these fields only, and ignores the rest of
+the message:
+
+    projection = MessageProjection({"item_hash", "sender", "content.address"})
+    record = projection.parse(message_dict)
+    record["content"]["address"]
+"""
+
+import json
+from functools import lru_cache
+from typing import (
+    Annotated,
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+    cast,
+    get_args,
+    get_origin,
+)
+
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from pydantic.fields import FieldInfo
+from typing_extensions import NotRequired, TypedDict
+
+from .models import BaseMessage, ItemType, message_classes
+
+# Requested paths as a tree of dicts, where fields requested as a whole are
+# None.
+_PathTree = Dict[str, Any]
+
+
+def _path_tree(fields: Iterable[str]) -> _PathTree:
+    paths = [path.split(".") for path in fields]
+    if not paths or not all(all(path) for path in paths):
+        raise ValueError(f"Invalid field paths {sorted(fields)}")
+    tree: _PathTree = {}
+    for path in sorted(paths, key=len):
+        node = tree
+        for name in path[:-1]:
+            if name in node and node[name] is None:
+                # The parent field is requested as a whole
+                break
+            node = node.setdefault(name, {})
+        else:
+            node[path[-1]] = None
+    return tree
+
+
+def _nested_model(annotation: Any) -> Tuple[Optional[Type[BaseModel]], bool]:
+    """Model of a field annotated with a model or an optional model, and
+    whether it is optional."""
+    optional = False
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        optional = len(args) < len(get_args(annotation))
+        if len(args) != 1:
+            return None, optional
+        annotation = args[0]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, optional
+    return None, optional
+
+
+def _field_type(field: FieldInfo) -> Any:
+    """Annotation of a field, with its constraints."""
+    if field.metadata:
+        return Annotated[(field.annotation, *field.metadata)]  # type: ignore
+    return field.annotation
+
+
+def _record_fields(
+    model: Type[BaseModel], tree: _PathTree, path: str = ""
+) -> Dict[str, Any]:
+    """Annotations of the requested fields of `model`, by key in raw messages."""
+    annotations: Dict[str, Any] = {}
+    for name, subtree in tree.items():
+        field = model.model_fields.get(name)
+        if field is None:
+            raise ValueError(f"Unknown field '{path}{name}' in {model.__name__}")
+        field_type: Any
+        if subtree:
+            nested, optional = _nested_model(field.annotation)
+            if nested is None:
+                raise ValueError(f"Field '{path}{name}' has no nested fields")
+            field_type = _record_type(
+                nested, _record_fields(nested, subtree, f"{path}{name}.")
+            )
+            if optional:
+                field_type = Optional[field_type]
+        else:
+            field_type = _field_type(field)
+        if not field.is_required():
+            field_type = NotRequired[field_type]
+        annotations[field.alias or name] = field_type
+    return annotations
+
+
+def _record_type(model: Type[BaseModel], annotations: Dict[str, Any]) -> Any:
+    return TypedDict(f"{model.__name__}Record", annotations)  # type: ignore
+
+
+@lru_cache(maxsize=64)
+def _projection_adapter(fields: FrozenSet[str]) -> TypeAdapter:
+    tree = _path_tree(fields)
+    if "content" not in tree:
+        return TypeAdapter(_record_type(BaseMessage, _record_fields(BaseMessage, tree)))
+
+    # The model of the content depends on the type of the message. Content
+    # fields are ignored for the types of messages that do not have them.
+    record_types = []
+    known_fields: Set[str] = set()
+    for message_class in message_classes:
+        annotations = _record_fields(message_class, {**tree, "content": None})
+        annotations["type"] = message_class.model_fields["type"].annotation
+        if tree["content"]:
+            content_model = cast(
+                Type[BaseModel], message_class.model_fields["content"].annotation
+            )
+            content_tree = {
+                name: subtree
+                for name, subtree in tree["content"].items()
+                if name in content_model.model_fields
+            }
+            known_fields.update(content_tree)
+            annotations["content"] = _record_type(
+                content_model, _record_fields(content_model, content_tree, "content.")
+            )
+        record_types.append(_record_type(message_class, annotations))
+
+    unknown_fields = set(tree["content"] or ()) - known_fields
+    if unknown_fields:
+        raise ValueError(
+            "Unknown content fields "
+            + ", ".join(f"'content.{name}'" for name in sorted(unknown_fields))
+        )
+    tagged_record: Any = Annotated[
+        Union[tuple(record_types)], Field(discriminator="type")
+    ]
+    return TypeAdapter(tagged_record)
+
+
+def _is_missing_content(error: ValidationError) -> bool:
+    return any(
+        line["type"] == "missing" and line["loc"][-1:] == ("content",)
+        for line in error.errors()
+    )
+
+
+class MessageProjection:
+    """Parser of the requested fields of messages.
+
+    Fields are given by their path, such as `"sender"` or `"content.address"`,
+    and a field requested as a whole includes all its nested fields. Records
+    are dicts of the requested fields, nested as in messages, with the same
+    types and constraints as the fields of the messages. Fields that are
+    optional in messages are only in records when present in the message.
+
+    When fields of the content are requested, the `type` of the message is
+    part of the record, as it determines the model of the content. Content
+    fields that the content model of a type of message does not have are
+    ignored for this type.
+
+    Validators that check a field against others, such as the check of the
+    item hash against the item content, are not run: use `parse_message`
+    for messages that are not trusted.
+    """
+
+    __slots__ = ("fields", "_adapter", "_with_content")
+
+    fields: FrozenSet[str]
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = frozenset(fields)
+        self._adapter = _projection_adapter(self.fields)
+        self._with_content = any(
+            path == "content" or path.startswith("content.") for path in self.fields
+        )
+
+    def parse(self, message_dict: Dict[str, Any]) -> Dict[str, Any]:
+        """Record of a message dict, raises a `ValidationError` if invalid.
+
+        The content of inline messages is decoded from `item_content` if
+        needed and missing.
+        """
+        if (
+            self._with_content
+            and "content" not in message_dict
+            and message_dict.get("item_type") == ItemType.inline
+            and isinstance(message_dict.get("item_content"), str)
+        ):
+            try:
+                content = json.loads(message_dict["item_content"])
+            except json.JSONDecodeError:
+                pass
+            else:
+                message_dict = {**message_dict, "content": content}
+        return self._adapter.validate_python(message_dict)
+
+    def parse_json(self, json_data: Union[bytes, bytearray, str]) -> Dict[str, Any]:
+        """Record of a JSON serialized message, raises a `ValidationError` if
+        invalid.
+
+        As with `parse`, the content of inline messages is decoded from
+        `item_content` if needed and missing.
+        """
+        try:
+            return self._adapter.validate_json(json_data)
+        except ValidationError as error:
+            if not self._with_content or not _is_missing_content(error):
+                raise
+        # Only known to be missing once the JSON is validated
+        return self.parse(json.loads(json_data))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({sorted(self.fields)!r})"
+
+
+def parse_message_fields(
+    message: Union[Dict[str, Any], bytes, bytearray, str], fields: Iterable[str]
+) -> Dict[str, Any]:
+    """Record of the requested `fields` of a message dict or JSON serialized
+    message, see `MessageProjection`.
+
+    Projections are cached by set of fields, but creating a
+    `MessageProjection` once is faster for many messages.
+    """
+    projection = MessageProjection(fields)
+    if isinstance(message, dict):
+        return projection.parse(message)
+    return projection.parse_json(message)
@@ -0,0 +1,177 @@
+"""Incremental reading of message pages returned by the API of Aleph nodes.
+
+`MessagesResponse` requires the whole page to be decoded before it can be
+validated. The reader defined here instead decodes and validates the messages
+of a page one at a time while the page is being read, so that memory use does
+not depend on the number of messages in the page.
+"""
+
+import codecs
+import json
+from typing import IO, Any, Dict, Iterable, Iterator, Optional, Union
+
+from pydantic import BaseModel, ConfigDict
+
+from .models import AlephMessage, ValidationLevel, parse_message
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_VALUE_SIZE = 16 * 1024 * 1024
+
+_WHITESPACE = " \t\n\r"
+
+
+class MessagesPagination(BaseModel):
+    """Pagination fields of a `messages.json` response."""
+
+    pagination_page: int
+    pagination_total: int
+    pagination_per_page: int
+    pagination_item: str
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class MessagesResponseReader:
+    """Streaming reader for a `messages.json` response of an Aleph node.
+
+    The source can be a binary or text file object, such as an open file or a
+    raw HTTP response, or an iterable of bytes chunks.
+
+    Iterating over the reader yields the validated messages of the page in
+    order. The pagination fields are available in `pagination` once the whole
+    response has been read. A reader can only be iterated once.
+
+    A `ValueError` is raised for a message, or any other value of the
+    response, longer than `max_value_size` characters, so that invalid JSON
+    is not buffered until the end of the response.
+    """
+
+    pagination: Optional[MessagesPagination] = None
+
+    def __init__(
+        self,
+        source: Union[IO[bytes], IO[str], Iterable[bytes]],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        validation_level: ValidationLevel = ValidationLevel.full,
+        max_value_size: int = DEFAULT_MAX_VALUE_SIZE,
+    ):
+        self.validation_level = validation_level
+        self.max_value_size = max_value_size
+        self._chunks = self._read_chunks(source, chunk_size)
+        self._decoder = json.JSONDecoder()
+        self._chunk_size = chunk_size
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+
+    def __iter__(self) -> Iterator[AlephMessage]:
+        for message_dict in self.iter_raw():
+            yield parse_message(message_dict, self.validation_level)
+
+    def iter_raw(self) -> Iterator[Dict[str, Any]]:
+        """Yields the messages of the page as decoded dicts, without validation."""
+        fields: Dict[str, Any] = {}
+        self._expect("{")
+        if self._peek() == "}":
+            self._position += 1
+        else:
+            while True:
+                key = self._decode_value()
+                if not isinstance(key, str):
+                    raise ValueError("Expected a string as key of the response")
+                self._expect(":")
+                if key == "messages":
+                    yield from self._iter_array()
+                else:
+                    fields[key] = self._decode_value()
+                if self._expect(",", "}") == "}":
+                    break
+        self.pagination = MessagesPagination.model_validate(fields)
+
+    @staticmethod
+    def _read_chunks(
+        source: Union[IO[bytes], IO[str], Iterable[bytes]], chunk_size: int
+    ) -> Iterator[str]:
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        if hasattr(source, "read"):
+            chunks: Iterable[Union[bytes, str]] = iter(
+                lambda: source.read(chunk_size), source.read(0)  # type: ignore
+            )
+        else:
+            chunks = source
+        for chunk in chunks:
+            yield decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+        yield decoder.decode(b"", final=True)
+
+    def _fill(self, min_size: int) -> None:
+        """Read at least `min_size` more characters from the source, if any."""
+        # Drop the part of the buffer that has already been decoded.
+        if self._position:
+            self._buffer = self._buffer[self._position :]
+            self._position = 0
+        read = 0
+        parts = [self._buffer]
+        while read < min_size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._eof = True
+                break
+            parts.append(chunk)
+            read += len(chunk)
+        self._buffer = "".join(parts)
+
+    def _peek(self) -> str:
+        """Returns the next non-whitespace character, without consuming it."""
+        while True:
+            while (
+                self._position < len(self._buffer)
+                and self._buffer[self._position] in _WHITESPACE
+            ):
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if self._eof:
+                raise ValueError("Unexpected end of the response")
+            self._fill(self._chunk_size)
+
+    def _expect(self, *expected: str) -> str:
+        char = self._peek()
+        if char not in expected:
+            raise ValueError(
+                f"Expected {' or '.join(map(repr, expected))} "
+                f"in the response, got {char!r}"
+            )
+        self._position += 1
+        return char
+
+    def _decode_value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            else:
+                # A number at the end of the buffer may continue in the next chunk.
+                if end < len(self._buffer) or self._eof:
+                    self._position = end
+                    return value
+            pending = len(self._buffer) - self._position
+            if pending > self.max_value_size:
+                raise ValueError(
+                    f"Value of the response longer than {self.max_value_size} characters"
+                )
+            # Read at least as much as the pending part of the buffer, so that
+            # large values are not decoded over and over again.
+            self._fill(max(self._chunk_size, pending))
+
+    def _iter_array(self) -> Iterator[Any]:
+        self._expect("[")
+        if self._peek() == "]":
+            self._position += 1
+            return
+        while True:
+            yield self._decode_value()
+            if self._expect(",", "]") == "]":
+                return
@@ -0,0 +1,38 @@
+import json
+from pathlib import Path
+from typing import Callable, List
+
+import pytest
+
+from aleph_message.models import AlephMessage, add_item_content_and_hash, parse_message
+
+MESSAGES_DIRECTORY = Path(__file__).parent / "messages"
+
+
+def _load_message_dict(filename: str) -> dict:
+    path = MESSAGES_DIRECTORY / filename
+    message_dict = add_item_content_and_hash(json.loads(path.read_text()))
+    # MongoDB identifiers are not part of the messages
+    message_dict.pop("_id", None)
+    return message_dict
+
+
+@pytest.fixture
+def load_message_dict() -> Callable[[str], dict]:
+    """Loads a message of the `messages` directory, with its item hash."""
+    return _load_message_dict
+
+
+@pytest.fixture
+def message_dicts() -> List[dict]:
+    """A PROGRAM, an INSTANCE and a FORGET message, with their item hash."""
+    return [
+        _load_message_dict(filename)
+        for filename in ("machine.json", "instance_machine.json", "forget.json")
+    ]
+
+
+@pytest.fixture
+def messages(message_dicts: List[dict]) -> List[AlephMessage]:
+    """The messages of `message_dicts`, validated."""
+    return [parse_message(message_dict) for message_dict in message_dicts]
@@ -0,0 +1,64 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from pydantic import ValidationError
+
+from aleph_message.aio import aiter_messages, aparse_message, aparse_message_json
+from aleph_message.models import ForgetMessage, InstanceMessage, ProgramMessage
+
+
+def test_aparse_message(message_dicts):
+    program_dict, _, forget_dict = message_dicts
+
+    async def parse():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            return (
+                await aparse_message(program_dict, executor=executor),
+                await aparse_message_json(json.dumps(forget_dict)),
+            )
+
+    program, forget = asyncio.run(parse())
+    assert isinstance(program, ProgramMessage)
+    assert isinstance(forget, ForgetMessage)
+
+
+def test_aiter_messages(message_dicts):
+    raw_messages = [message_dicts[0], json.dumps(message_dicts[1]).encode()] * 5
+    raw_messages.append(json.dumps(message_dicts[2]))
+    read = []
+
+    async def source():
+        for raw_message in raw_messages:
+            read.append(raw_message)
+            yield raw_message
+
+    async def collect():
+        messages = []
+        async for message in aiter_messages(source(), max_in_flight=2):
+            # Backpressure: the source is not read ahead of the limit
+            assert len(read) - len(messages) <= 2
+            messages.append(message)
+        return messages
+
+    messages = asyncio.run(collect())
+    assert [type(message) for message in messages] == [
+        ProgramMessage,
+        InstanceMessage,
+    ] * 5 + [ForgetMessage]
+
+
+def test_aiter_messages_invalid(message_dicts):
+    raw_messages = [message_dicts[0], {"type": "POST"}, message_dicts[1]]
+
+    async def collect():
+        return [message async for message in aiter_messages(raw_messages)]
+
+    with pytest.raises(ValidationError):
+        asyncio.run(collect())
+
+    with pytest.raises(ValueError):
+        asyncio.run(
+            aiter_messages(raw_messages, max_in_flight=0).__anext__()  # type: ignore
+        )
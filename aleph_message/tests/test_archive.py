@@ -0,0 +1,112 @@
+import pytest
+
+from aleph_message.archive import MessageArchive, MessageArchiveBuilder
+from aleph_message.models import ValidationLevel, parse_message
+from aleph_message.models.item_hash import ItemHash
+
+CIDV0_HASH = "QmPxCe3eHVCdTG5uKnSZTsPGrYvMFTWAAt4PSfK7ETkz4d"
+# CIDv1 of the same content as CIDV0_HASH
+CIDV1_HASH = "bafybeiax64pfzzusica23t6yuombopiqp37x64ingmjblk2rvm4qguqrzy"
+
+
+@pytest.fixture
+def messages(message_dicts, messages):
+    ipfs_dict = {
+        **message_dicts[-1],
+        "item_type": "ipfs",
+        "item_content": None,
+        "item_hash": CIDV0_HASH,
+    }
+    return messages + [parse_message(ipfs_dict)]
+
+
+@pytest.mark.parametrize("content_from_item_content", [False, True])
+def test_archive(tmp_path, messages, content_from_item_content):
+    path = tmp_path / "messages.archive"
+    builder = MessageArchiveBuilder(
+        path, content_from_item_content=content_from_item_content
+    )
+    with builder:
+        assert builder.write_many(messages) == len(messages)
+    assert (tmp_path / "messages.archive.index").exists()
+
+    with MessageArchive(path, ValidationLevel.trusted) as archive:
+        assert len(archive) == len(messages)
+        assert list(archive) == messages
+        for message in messages:
+            assert message.item_hash in archive
+            assert archive[message.item_hash] == message
+        # Both versions of a CID have the same digest
+        assert archive[CIDV1_HASH] == messages[-1]
+
+        missing = ItemHash.from_digest(bytes(32))
+        assert missing not in archive
+        assert archive.get(missing) is None
+        assert "not a hash" not in archive
+        with pytest.raises(KeyError):
+            archive[missing]
+
+    with MessageArchive(path, lazy_content=True) as archive:
+        message = archive[messages[1].item_hash]
+        assert not message.content_loaded
+        assert message == messages[1]
+
+
+def test_append(tmp_path, messages):
+    path = tmp_path / "messages.archive"
+    index_path = tmp_path / "index"
+    with MessageArchiveBuilder(path, index_path) as builder:
+        builder.write_many(messages[:2])
+    # Records written by a builder that was not closed are not indexed
+    builder = MessageArchiveBuilder(path, index_path)
+    builder.write(messages[2])
+    builder._file.close()
+
+    with MessageArchiveBuilder(path, index_path) as builder:
+        builder.write_many(messages[2:])
+        assert builder.count == len(messages) - 2
+    with MessageArchive(path, index_path=index_path) as archive:
+        assert list(archive) == messages
+        assert archive[messages[0].item_hash] == messages[0]
+        assert archive[messages[3].item_hash] == messages[3]
+
+
+def test_empty_archive(tmp_path):
+    path = tmp_path / "messages.archive"
+    MessageArchiveBuilder(path).close()
+    with MessageArchive(path) as archive:
+        assert len(archive) == 0
+        assert list(archive) == []
+        assert CIDV0_HASH not in archive
+
+
+def test_invalid_archive(tmp_path, messages):
+    path = tmp_path / "messages.archive"
+    with MessageArchiveBuilder(path) as builder:
+        builder.write_many(messages)
+    index_path = tmp_path / "messages.archive.index"
+    index = index_path.read_bytes()
+
+    index_path.write_bytes(b"XXXX" + index[4:])
+    with pytest.raises(ValueError, match="Not an archive index"):
+        MessageArchive(path)
+    index_path.write_bytes(index[:-1])
+    with pytest.raises(ValueError, match="Truncated archive index"):
+        MessageArchive(path)
+
+    index_path.write_bytes(index)
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError, match="Truncated archive data"):
+        MessageArchive(path)
+
+
+def test_data_without_index(tmp_path, messages):
+    path = tmp_path / "messages.archive"
+    with MessageArchiveBuilder(path) as builder:
+        builder.write_many(messages)
+    data = path.read_bytes()
+    (tmp_path / "messages.archive.index").unlink()
+
+    with pytest.raises(ValueError, match="Archive data without index"):
+        MessageArchiveBuilder(path)
+    assert path.read_bytes() == data
@@ -0,0 +1,18 @@
+from aleph_message.benchmarks import iter_benchmarks, run_benchmarks
+from aleph_message.benchmarks.__main__ import main
+
+
+def test_benchmarks_run():
+    names = [name for name, _ in iter_benchmarks(page_size=10)]
+    assert len(names) == len(set(names))
+
+    results = run_benchmarks(repeat=1, loops=1, page_size=10)
+    assert [result.name for result in results] == names
+    assert all(result.best > 0 for result in results)
+
+
+def test_benchmarks_main(capsys):
+    main(["ItemHash", "--repeat", "1", "--loops", "1", "--page-size", "10"])
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 3
+    assert all('"name": "ItemHash[' in line for line in lines)
@@ -0,0 +1,84 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from aleph_message.bulk import ValidationSummary, main, validate_archive
+
+
+@pytest.fixture
+def pages_directory(tmp_path: Path, message_dicts: list) -> Path:
+    valid, instance, forget = message_dicts
+    invalid = dict(forget, item_hash="cafe" * 16)
+    pages = {"1.json": [valid, invalid], "2.json": [instance], "10.json": [valid]}
+    for filename, messages in pages.items():
+        (tmp_path / filename).write_text(json.dumps({"messages": messages}))
+    return tmp_path
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_validate_pages(pages_directory: Path, workers: int):
+    results = list(validate_archive(pages_directory, workers=workers))
+
+    assert [Path(result.source).name for result in results] == [
+        "1.json",
+        "2.json",
+        "10.json",
+    ]
+    failures = [failure for result in results for failure in result.failures]
+    assert [(failure.index, failure.item_hash) for failure in failures] == [
+        (1, "cafe" * 16)
+    ]
+
+    summary = ValidationSummary()
+    for result in results:
+        summary.add(result)
+    assert (summary.messages, summary.failures) == (4, 1)
+
+
+def test_validate_lines(message_dicts):
+    lines = [json.dumps(message_dict) for message_dict in message_dicts] * 3
+    lines.insert(4, "{not json")
+    lines.insert(6, json.dumps({"type": "POST"}))
+    lines.insert(1, "")
+    lines.insert(3, "  ")
+
+    results = list(validate_archive(lines, workers=1, chunk_size=4))
+    assert [result.messages for result in results] == [2, 4, 4, 1]
+    failures = [failure for result in results for failure in result.failures]
+    # Indexes are the numbers of the lines, blank lines included
+    assert [failure.index for failure in failures] == [6, 8]
+    assert lines[6] == "{not json"
+    assert failures[0].errors[0]["type"] == "json_invalid"
+
+
+def test_validate_invalid_pages(pages_directory: Path):
+    (pages_directory / "3.json").write_text("{not json")
+    (pages_directory / "4.json").write_text(json.dumps({"pagination_page": 4}))
+
+    results = list(validate_archive(pages_directory, workers=1))
+    assert [Path(result.source).name for result in results] == [
+        "1.json",
+        "2.json",
+        "3.json",
+        "4.json",
+        "10.json",
+    ]
+    failures = [failure for result in results for failure in result.failures]
+    assert [(Path(failure.source).name, failure.index) for failure in failures] == [
+        ("1.json", 1),
+        ("3.json", -1),
+        ("4.json", -1),
+    ]
+    assert failures[1].errors[0]["type"] == "json_invalid"
+    assert failures[2].errors[0]["loc"] == ("messages",)
+
+
+def test_main(pages_directory: Path, capsys):
+    assert main([str(pages_directory), "--workers", "1"]) == 1
+    output = capsys.readouterr()
+
+    failures = [json.loads(line) for line in output.out.splitlines()]
+    assert len(failures) == 1 and failures[0]["item_hash"] == "cafe" * 16
+    summary = json.loads(output.err)
+    assert summary["messages"] == 4 and summary["failures"] == 1
@@ -0,0 +1,59 @@
+import json
+from hashlib import sha256
+from pathlib import Path
+
+import pytest
+
+from aleph_message.models.canonical import (
+    dump_canonical_json,
+    hash_canonical_json,
+    hash_item_content,
+    iter_canonical_json,
+)
+
+CONTENTS = [
+    {},
+    [],
+    "text",
+    None,
+    {"a": {"b": {"c": {"d": [1, 2.5, True, None, "é"]}}}},
+    {"list": [[], {}, ("tuple", 1)], "unicode": "日本語 🚀", "escape": '"\\\n'},
+    {"int": {1: "one", 2.5: "float", None: "null"}},
+    [{"key": "value"}] * 100,
+    {"large": ["x" * 1000 for _ in range(200)]},
+]
+
+
+@pytest.mark.parametrize("content", CONTENTS)
+def test_canonical_json(content):
+    expected = json.dumps(content, separators=(",", ":")).encode()
+    assert b"".join(iter_canonical_json(content)) == expected
+    assert b"".join(iter_canonical_json(content, chunk_size=10)) == expected
+    assert dump_canonical_json(content) == (expected, sha256(expected).hexdigest())
+    assert hash_canonical_json(content) == sha256(expected).hexdigest()
+
+
+def test_canonical_json_messages():
+    for path in (Path(__file__).parent / "messages").glob("*.json"):
+        content = json.loads(path.read_text())["content"]
+        item_content = json.dumps(content, separators=(",", ":"))
+        assert dump_canonical_json(content).data == item_content.encode()
+        assert hash_item_content(item_content) == (
+            sha256(item_content.encode()).hexdigest()
+        )
+
+
+def test_canonical_json_chunks():
+    content = {"large": ["x" * 1000 for _ in range(200)]}
+    chunks = list(iter_canonical_json(content, chunk_size=10_000))
+    assert len(chunks) > 10
+    assert max(len(chunk) for chunk in chunks) < 20_000
+
+
+def test_canonical_json_errors():
+    circular: dict = {}
+    circular["self"] = {"nested": circular}
+    with pytest.raises(ValueError):
+        dump_canonical_json(circular)
+    with pytest.raises(TypeError):
+        dump_canonical_json({"object": object()})
@@ -0,0 +1,79 @@
+import pytest
+from pydantic import ValidationError
+
+from aleph_message.codes import CHAIN_CODES
+from aleph_message.columns import (
+    CHAIN_CATEGORIES,
+    ITEM_TYPE_CATEGORIES,
+    MESSAGE_TYPE_CATEGORIES,
+    messages_to_columns,
+)
+from aleph_message.models import Chain, ItemHash, ItemType, MessageType, parse_message
+
+np = pytest.importorskip("numpy")
+
+IPFS_HASH = "QmPZ9gcCEpqKTo6aq61g2nXGUhM4iCL3ewB6LDXZCtioEB"
+
+
+@pytest.fixture
+def message_dicts(message_dicts):
+    message_dicts[1]["channel"] = None
+    message_dicts[1]["sender"] = "0x" + "1" * 40
+    return message_dicts
+
+
+def test_messages_to_columns(message_dicts):
+    messages = [parse_message(message_dict) for message_dict in message_dicts]
+
+    columns = messages_to_columns(messages)
+    assert len(columns) == 3
+    assert [CHAIN_CATEGORIES[code] for code in columns.chain] == [
+        message.chain for message in messages
+    ]
+    assert [MESSAGE_TYPE_CATEGORIES[code] for code in columns.type] == [
+        message.type for message in messages
+    ]
+    assert [ITEM_TYPE_CATEGORIES[code] for code in columns.item_type] == [
+        message.item_type for message in messages
+    ]
+    assert columns.chain.dtype == np.int8
+    assert columns.time.tolist() == [message.time.timestamp() for message in messages]
+    assert columns.size.tolist() == [
+        -1 if message.size is None else message.size for message in messages
+    ]
+    assert columns.item_hash.shape == (3, 32)
+    assert [bytes(row) for row in columns.item_hash] == [
+        message.item_hash.digest for message in messages
+    ]
+    assert columns.sender.decode() == [message.sender for message in messages]
+    assert len(columns.sender.values) == 2
+    assert columns.channel.decode() == [message.channel for message in messages]
+    assert columns.channel.codes[1] == -1
+
+    # Raw dicts give the same columns
+    from_dicts = messages_to_columns(message_dicts)
+    for name in ("chain", "type", "item_type", "time", "size", "item_hash"):
+        assert np.array_equal(getattr(from_dicts, name), getattr(columns, name))
+    assert from_dicts.sender.decode() == columns.sender.decode()
+
+    assert len(messages_to_columns([])) == 0
+
+
+def test_messages_to_columns_raw_dicts(message_dicts):
+    # Only the exported fields are validated
+    message_dicts[0]["content"] = {}
+    message_dicts[1].update(item_type="ipfs", item_hash=IPFS_HASH)
+    columns = messages_to_columns(message_dicts)
+    assert bytes(columns.item_hash[1]) == ItemHash(IPFS_HASH).digest
+
+    message_dicts[0]["chain"] = "UNKNOWN"
+    with pytest.raises(ValidationError):
+        messages_to_columns(message_dicts)
+
+
+def test_category_codes():
+    assert set(CHAIN_CATEGORIES) == set(Chain)
+    assert set(MESSAGE_TYPE_CATEGORIES) == set(MessageType)
+    assert set(ITEM_TYPE_CATEGORIES) == set(ItemType)
+    # Codes are the stable ones of the wire format
+    assert {chain: code for code, chain in enumerate(CHAIN_CATEGORIES)} == (CHAIN_CODES)
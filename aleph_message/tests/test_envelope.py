@@ -0,0 +1,49 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from aleph_message import MessageEnvelope
+from aleph_message.models import ProgramMessage
+
+
+@pytest.mark.parametrize("from_json", [False, True])
+def test_message_envelope(from_json, load_message_dict):
+    message_dict = load_message_dict("machine.json")
+    if from_json:
+        envelope = MessageEnvelope.from_json(json.dumps(message_dict).encode())
+    else:
+        envelope = MessageEnvelope.from_dict(message_dict)
+
+    assert envelope.item_hash == message_dict["item_hash"]
+    assert envelope.type == "PROGRAM"
+    assert envelope.sender == message_dict["sender"]
+    assert envelope.chain == "ETH"
+    assert envelope.channel == message_dict["channel"]
+    assert envelope.time.timestamp() == pytest.approx(message_dict["time"])
+    assert not hasattr(envelope, "__dict__")
+
+    message = envelope.upgrade()
+    assert isinstance(message, ProgramMessage)
+    assert message.item_hash == envelope.item_hash
+    assert message.time == envelope.time
+
+
+def test_message_envelope_validation(load_message_dict):
+    message_dict = load_message_dict("machine.json")
+
+    # The content is not validated
+    envelope = MessageEnvelope.from_dict({**message_dict, "content": {}})
+    with pytest.raises(ValidationError):
+        envelope.upgrade()
+
+    # Envelope fields are
+    with pytest.raises(ValidationError):
+        MessageEnvelope.from_dict({**message_dict, "chain": "UNKNOWN"})
+    with pytest.raises(ValidationError):
+        MessageEnvelope.from_dict({**message_dict, "item_hash": "invalid"})
+    with pytest.raises(ValidationError):
+        MessageEnvelope.from_json(json.dumps({**message_dict, "channel": "c" * 200}))
+    del message_dict["sender"]
+    with pytest.raises(ValidationError):
+        MessageEnvelope.from_dict(message_dict)
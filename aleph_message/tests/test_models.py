@@ -1,24 +1,32 @@
+import copy
 import json
 import os.path
+import pickle
+from hashlib import sha256
 from os import listdir
 from os.path import isdir, join
 from pathlib import Path
+from typing import List
 from unittest import mock
 
 import pytest
 import requests
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
 from rich.console import Console
 
 from aleph_message.exceptions import UnknownHashError
 from aleph_message.models import (
     AggregateMessage,
+    AlephMessage,
+    ForgetContent,
     ForgetMessage,
     InstanceContent,
     InstanceMessage,
+    ItemHash,
     ItemType,
     MessagesResponse,
     MessageType,
+    ModelInterner,
     Payment,
     PaymentType,
     PostContent,
@@ -26,11 +34,15 @@ from aleph_message.models import (
     ProgramMessage,
     StoreContent,
     StoreMessage,
+    ValidationLevel,
+    _decoded_item_content,
     add_item_content_and_hash,
     create_message_from_file,
     create_message_from_json,
     create_new_message,
     parse_message,
+    parse_message_json,
+    parse_messages,
 )
 from aleph_message.models.execution.abstract import (
     MAX_AUTHORIZED_KEY_LENGTH,
@@ -490,6 +502,193 @@ def test_create_new_message():
     assert create_message_from_json(json.dumps(message_dict))
 
 
+@pytest.mark.parametrize(
+    "filename, message_class",
+    [
+        ("machine.json", ProgramMessage),
+        ("instance_machine.json", InstanceMessage),
+        ("forget.json", ForgetMessage),
+    ],
+)
+def test_parse_message_dispatch(filename, message_class):
+    path = Path(__file__).parent / "messages" / filename
+    message_dict = add_item_content_and_hash(json.loads(path.read_text()))
+
+    message = parse_message(message_dict)
+    assert type(message) is message_class
+
+
+def test_parse_message_unknown_type():
+    path = Path(__file__).parent / "messages/forget.json"
+    message_dict = add_item_content_and_hash(json.loads(path.read_text()))
+
+    message_dict["type"] = "UNKNOWN"
+    with pytest.raises(ValidationError) as excinfo:
+        parse_message(message_dict)
+    assert excinfo.value.errors()[0]["type"] == "union_tag_invalid"
+
+    # Errors are located under the message type used for dispatch
+    message_dict["type"] = "FORGET"
+    message_dict["content"]["hashes"] = ["not-a-hash"]
+    message_dict = add_item_content_and_hash(message_dict)
+    with pytest.raises(ValidationError) as excinfo:
+        parse_message(message_dict)
+    assert excinfo.value.errors()[0]["loc"][:3] == ("FORGET", "content", "hashes")
+
+
+@pytest.mark.parametrize(
+    "filename", ["machine.json", "instance_machine.json", "forget.json"]
+)
+def test_parse_message_json(filename):
+    path = Path(__file__).parent / "messages" / filename
+    message_dict = add_item_content_and_hash(json.loads(path.read_text()))
+    json_data = json.dumps(message_dict)
+
+    message = parse_message_json(json_data.encode())
+    assert message == parse_message(message_dict)
+    assert parse_message_json(json_data) == message
+
+    # The item_hash is still checked
+    message_dict["item_hash"] = "cafe" * 16
+    with pytest.raises(ValidationError) as excinfo:
+        parse_message_json(json.dumps(message_dict))
+    assert "'item_hash' do not match" in str(excinfo.value)
+
+
+def test_parse_messages():
+    message_dicts = []
+    for filename in ("machine.json", "forget.json", "instance_machine.json"):
+        path = Path(__file__).parent / "messages" / filename
+        message_dicts.append(add_item_content_and_hash(json.loads(path.read_text())))
+
+    invalid_dict = dict(message_dicts[1], sender=None)
+    batch = [message_dicts[0], invalid_dict, "not a message", message_dicts[2]]
+
+    messages, errors = parse_messages(iter(batch))
+    assert [type(message) for message in messages] == [ProgramMessage, InstanceMessage]
+
+    assert [(error.index, error.item_hash) for error in errors] == [
+        (1, invalid_dict["item_hash"]),
+        (2, None),
+    ]
+    assert isinstance(errors[0].error, ValidationError)
+    assert errors[0].error.errors()[0]["loc"] == ("FORGET", "sender")
+
+    assert parse_messages([]) == ([], [])
+
+
+def test_item_content_decoded_once():
+    path = Path(__file__).parent / "messages/machine.json"
+    message_dict = add_item_content_and_hash(json.loads(path.read_text()))
+
+    with mock.patch("aleph_message.models.json.loads", wraps=json.loads) as loads:
+        message = parse_message(message_dict)
+    assert isinstance(message, ProgramMessage)
+    assert loads.call_count == 1
+
+
+def test_content_from_item_content():
+    path = Path(__file__).parent / "messages/machine.json"
+    message_dict = add_item_content_and_hash(json.loads(path.read_text()))
+    expected = parse_message(message_dict)
+
+    # Messages with a content are validated from JSON without decoding it,
+    # only item_content is
+    with mock.patch("aleph_message.models.json.loads", wraps=json.loads) as loads:
+        message = parse_message_json(
+            json.dumps(message_dict), content_from_item_content=True
+        )
+    assert message == expected
+    assert loads.call_count == 1
+
+    # The content is only built from item_content on request
+    del message_dict["content"]
+    with pytest.raises(ValidationError, match="Field required"):
+        parse_message(message_dict)
+    message = parse_message(message_dict, content_from_item_content=True)
+    assert isinstance(message, ProgramMessage)
+    assert message.content == expected.content
+    message = parse_message_json(
+        json.dumps(message_dict), content_from_item_content=True
+    )
+    assert message.content == expected.content
+
+    # Non-inline messages still require a content
+    with pytest.raises(ValidationError):
+        parse_message(
+            {**message_dict, "item_type": "storage", "item_content": None},
+            content_from_item_content=True,
+        )
+
+
+def test_decoded_item_content_dropped_on_error():
+    message_dict = add_item_content_and_hash(
+        {
+            "chain": "ETH",
+            "sender": "0x" + "1" * 40,
+            "type": "POST",
+            "time": 1.0,
+            "item_type": "inline",
+            "content": {
+                "address": "0x" + "1" * 40,
+                "time": 1.0,
+                "type": "test",
+                "content": {"tags": ["a"]},
+            },
+            "signature": "0x0",
+        }
+    )
+    del message_dict["content"]
+    # Fails after item_content is decoded, with the same item_content
+    invalid_dict = {**message_dict, "item_hash": "cafe" * 16}
+
+    with pytest.raises(ValidationError):
+        parse_message(invalid_dict, content_from_item_content=True)
+    assert _decoded_item_content.get() is None
+    messages, errors = parse_messages(
+        [invalid_dict, message_dict], content_from_item_content=True
+    )
+    assert len(messages) == len(errors) == 1
+    assert _decoded_item_content.get() is None
+
+    # Messages do not share the decoded item_content
+    messages[0].content.content["tags"].append("b")
+    message = parse_message(message_dict, content_from_item_content=True)
+    assert message.content.content == {"tags": ["a"]}
+
+
+def test_validation_levels():
+    path = Path(__file__).parent / "messages/instance_gpu_machine.json"
+    message_dict = add_item_content_and_hash(json.loads(path.read_text()))
+    message_dict["item_hash"] = "cafe" * 16
+
+    with pytest.raises(ValidationError):
+        parse_message(message_dict)
+    message = parse_message(message_dict, ValidationLevel.skip_hash)
+    assert message.item_hash == "cafe" * 16
+
+    # Checks other than the hash still run unless the message is trusted
+    message_dict["content"]["requirements"]["node"] = None
+    message_dict = add_item_content_and_hash(message_dict)
+    message_dict["item_hash"] = "cafe" * 16
+    with pytest.raises(ValidationError):
+        parse_message(message_dict, ValidationLevel.skip_hash)
+    message = parse_message(message_dict, ValidationLevel.trusted)
+    assert isinstance(message, InstanceMessage)
+    assert message.content.requirements and not message.content.requirements.node
+
+    # Models accept the validation level in the validation context
+    message = InstanceMessage.model_validate(
+        message_dict, context={"validation_level": "trusted"}
+    )
+    assert message.item_hash == "cafe" * 16
+
+    # Field types are still validated
+    message_dict["sender"] = None
+    with pytest.raises(ValidationError):
+        parse_message(message_dict, ValidationLevel.trusted)
+
+
 def test_program_message_content_and_item_content_differ() -> None:
     # Test that a ValidationError is raised if the content and item_content differ
 
@@ -816,3 +1015,259 @@ def test_volume_label_length_boundary():
             size_mib=1,
             comment="c" * (MAX_VOLUME_LABEL_LENGTH + 1),
         )
+
+
+def test_forget_content_hashes():
+    item_hashes = [sha256(str(i).encode()).hexdigest() for i in range(10)]
+    content = ForgetContent(address="0x1", time=1.0, hashes=item_hashes)
+    assert content.hashes == item_hashes
+    assert all(type(item_hash) is ItemHash for item_hash in content.hashes)
+
+    # Errors still refer to the invalid hash
+    with pytest.raises(ValidationError) as exc_info:
+        ForgetContent(address="0x1", time=1.0, hashes=item_hashes + ["invalid"])
+    assert exc_info.value.errors()[0]["loc"] == ("hashes", 10)
+
+    # Lists that are too long are rejected before their hashes are classified
+    with mock.patch.object(ItemHash, "validate_many") as validate_many:
+        with pytest.raises(ValidationError, match="too_long"):
+            ForgetContent(address="0x1", time=1.0, hashes=item_hashes * 101)
+    validate_many.assert_not_called()
+
+
+def test_dump_bytes():
+    path = Path(__file__).parent / "messages/machine.json"
+    message_dict = add_item_content_and_hash(json.loads(path.read_text()))
+    json_data = json.dumps(message_dict).encode()
+
+    # Raw JSON containing a MongoDB identifier is not kept
+    message = parse_message_json(json_data, ValidationLevel.trusted, keep_raw_json=True)
+    assert message.dump_bytes() != json_data
+    assert b'"_id"' not in message.dump_bytes()
+    assert json.loads(message.dump_bytes()) == json.loads(
+        message.model_dump_json(exclude={"id_"})
+    )
+    # The dump is computed once
+    assert message.dump_bytes() is message.dump_bytes()
+
+    # The raw JSON is only kept at the trusted level, without being checked
+    del message_dict["_id"]
+    json_data = parse_message(message_dict).dump_bytes()
+    message = parse_message_json(json_data, keep_raw_json=True)
+    assert message.dump_bytes() is not json_data
+    assert message.dump_bytes() == json_data
+    message = parse_message_json(json_data, ValidationLevel.trusted, keep_raw_json=True)
+    assert message.dump_bytes() is json_data
+    assert message == parse_message_json(json_data)
+
+    # The raw JSON is dropped once a field is assigned, and assignments are
+    # validated
+    message.channel = "OTHER"
+    assert json.loads(message.dump_bytes())["channel"] == "OTHER"
+    with pytest.raises(ValidationError):
+        message.time = "not a time"
+
+
+def test_dump_bytes_unknown_fields():
+    message_dict = add_item_content_and_hash(
+        {
+            "chain": "ETH",
+            "sender": "0x101d8D16372dBf5f1614adaE95Ee5CCE61998Fc9",
+            "type": "STORE",
+            "time": 1625652287.017,
+            "item_type": "inline",
+            "content": {
+                "address": "0x101d8D16372dBf5f1614adaE95Ee5CCE61998Fc9",
+                "time": 1625652287.017,
+                "item_type": "storage",
+                "item_hash": "7eb2eca2378ea8855336ed76c8b26219f1cb90234d04441de9cf8cb1c649d003",
+            },
+            "signature": "0x123456789",
+        }
+    )
+    json_data = (
+        parse_message(message_dict)
+        .dump_bytes()
+        .replace(b'"content":{', b'"content":{"legacy":"dropped",')
+    )
+    message = parse_message_json(json_data, keep_raw_json=True)
+    # The unknown field is dropped by the model, and by its dumps
+    assert b"legacy" not in message.dump_bytes()
+
+
+def test_hashable_model_freeze():
+    path = Path(__file__).parent / "messages/machine.json"
+    message_dict = json.loads(path.read_text())
+    message_dict["content"]["metadata"] = {"nested": {"list": [1, {"a": 2}]}}
+    message = create_new_message(message_dict, factory=ProgramMessage)
+    content = message.content
+
+    # Nested dicts and lists are hashed
+    assert hash(content) == hash(content.model_copy())
+    assert not content.frozen
+
+    assert content.freeze() is content
+    assert content.frozen and content.resources.frozen and content.code.frozen
+    assert hash(content) == hash(content.model_copy())
+    with pytest.raises(ValidationError, match="frozen"):
+        content.resources.vcpus = 2
+    with pytest.raises(ValidationError, match="frozen"):
+        content.allow_amend = True
+    # Copies are not frozen
+    resources = content.resources.model_copy()
+    resources.vcpus = 2
+    assert not resources.frozen
+
+
+def test_forget_content_hash():
+    item_hash = "b236db23bf5ad005ad7f5d82eed08a68a925020f0755b2a59c03f784499198eb"
+    content = ForgetContent(
+        address="0x1", time=1.0, hashes=[item_hash], aggregates=[item_hash]
+    )
+    assert hash(content) == hash(content.model_copy())
+    assert content in {content.model_copy()}
+
+
+def test_fingerprint():
+    path = Path(__file__).parent / "messages/machine.json"
+    message = create_new_message(json.loads(path.read_text()), factory=ProgramMessage)
+    content = message.content
+    moved = content.model_copy(update={"time": 1.0, "address": "0x2"})
+
+    assert len(content.fingerprint()) == 64
+    assert content.fingerprint() != moved.fingerprint()
+    assert content.fingerprint(exclude_volatile=True) == moved.fingerprint(
+        exclude_volatile=True
+    )
+    assert content.resources.fingerprint() == moved.resources.fingerprint()
+    assert content.resources.fingerprint() != content.code.fingerprint()
+
+    # Fingerprints are cached on frozen models only
+    assert getattr(content, "_fingerprints", None) is None
+    fingerprint = content.freeze().fingerprint()
+    assert content._fingerprints == {False: fingerprint}
+
+
+def test_model_interner():
+    path = Path(__file__).parent / "messages/machine.json"
+    message_dict = add_item_content_and_hash(json.loads(path.read_text()))
+    interner = ModelInterner()
+
+    messages, errors = parse_messages([message_dict, message_dict], interner=interner)
+    assert not errors
+    first, second = messages[0].content, messages[1].content
+    assert first.resources is second.resources
+    assert first.runtime is second.runtime
+    assert first.environment is second.environment
+    assert first.resources.frozen
+    # Models that are not internable are not shared
+    assert first.code is not second.code
+
+    third = parse_message(message_dict, interner=interner).content
+    assert third.resources is first.resources
+    assert interner.stats["MachineResources"].requests == 3
+    assert interner.stats["MachineResources"].hits == 2
+    assert interner.stats["MachineResources"].unique == 1
+    assert interner.total.hits == len(interner.stats) * 2
+
+    # Without interner, sub-models are neither shared nor frozen
+    fourth = parse_message(message_dict).content
+    assert fourth.resources is not first.resources
+    assert not fourth.resources.frozen
+
+
+def test_lazy_content():
+    path = Path(__file__).parent / "messages/instance_gpu_machine.json"
+    message_dict = add_item_content_and_hash(json.loads(path.read_text()))
+    expected = parse_message(message_dict)
+
+    message = parse_message(message_dict, lazy_content=True)
+    assert isinstance(message, InstanceMessage)
+    assert message.sender == expected.sender
+    assert not message.content_loaded
+    assert repr(message).index("item_hash=") < repr(message).index("content=<deferred>")
+    assert message.content == expected.content
+    # Loaded messages are instances of their message class
+    assert message.content_loaded
+    assert type(message) is InstanceMessage
+    assert repr(message) == repr(expected)
+    assert message.model_dump_json() == expected.model_dump_json()
+
+    # Comparisons, dumps and copies load the content
+    message = parse_message_json(json.dumps(message_dict), lazy_content=True)
+    assert message.dump_bytes() == expected.dump_bytes()
+    assert parse_message(message_dict, lazy_content=True) == expected
+    assert pickle.loads(pickle.dumps(message)) == expected
+    assert copy.deepcopy(parse_message(message_dict, lazy_content=True)) == expected
+    response = MessagesResponse.model_construct(
+        messages=[parse_message(message_dict, lazy_content=True)]
+    )
+    assert response.model_dump()["messages"][0] == expected.model_dump()
+
+    # Messages nested in any model are loaded by its dumps
+    class Wrapper(BaseModel):
+        messages: List[AlephMessage]
+
+    wrapper = Wrapper(messages=[parse_message(message_dict, lazy_content=True)])
+    assert wrapper.model_dump_json() == Wrapper(messages=[expected]).model_dump_json()
+    assert type(wrapper.messages[0]) is InstanceMessage
+
+    # An assigned content replaces the deferred one
+    message = parse_message(message_dict, lazy_content=True)
+    message.content = expected.content
+    assert type(message) is InstanceMessage
+    assert message == expected
+
+    # The content is decoded from item_content when missing, on request
+    del message_dict["content"]
+    with pytest.raises(ValidationError) as excinfo:
+        parse_message_json(json.dumps(message_dict), lazy_content=True)
+    assert excinfo.value.errors()[0]["loc"] == ("INSTANCE", "content")
+    message = parse_message(
+        message_dict, lazy_content=True, content_from_item_content=True
+    )
+    assert message.content == expected.content
+
+    # The item hash is still checked eagerly
+    with pytest.raises(ValidationError):
+        parse_message({**message_dict, "item_hash": "cafe" * 16}, lazy_content=True)
+
+
+def test_lazy_content_errors():
+    path = Path(__file__).parent / "messages/instance_gpu_machine.json"
+    message_dict = add_item_content_and_hash(json.loads(path.read_text()))
+    message_dict["content"]["requirements"]["node"] = None
+    message_dict = add_item_content_and_hash(message_dict)
+
+    # Errors in the content are raised on each access
+    messages, errors = parse_messages([message_dict], lazy_content=True)
+    assert not errors
+    for _ in range(2):
+        with pytest.raises(ValidationError) as excinfo:
+            messages[0].content
+        assert excinfo.value.errors()[0]["loc"] == ("content",)
+    assert not messages[0].content_loaded
+
+    # Invalid messages can still be represented and compared
+    assert "content=<deferred>" in repr(messages[0])
+    assert "content=<deferred>" in str(messages[0])
+    assert messages[0] == parse_message(message_dict, lazy_content=True)
+    assert messages[0] != parse_message(message_dict, ValidationLevel.trusted)
+    with pytest.raises(ValidationError):
+        hasattr(messages[0], "content")
+
+    message = parse_message(message_dict, ValidationLevel.trusted, lazy_content=True)
+    assert message.content.requirements and not message.content.requirements.node
+
+    item_content = "{not json"
+    del message_dict["content"]
+    message_dict.update(
+        item_content=item_content,
+        item_hash=sha256(item_content.encode()).hexdigest(),
+    )
+    message = parse_message(
+        message_dict, lazy_content=True, content_from_item_content=True
+    )
+    with pytest.raises(ValidationError) as excinfo:
+        message.content
+    assert "does not appear to be valid JSON" in str(excinfo.value)
@@ -0,0 +1,76 @@
+import gzip
+import io
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from aleph_message.models import ValidationLevel, parse_message_json
+from aleph_message.ndjson import (
+    MessageArchiveWriter,
+    iter_lines,
+    read_messages,
+    write_messages,
+)
+
+
+@pytest.mark.parametrize("filename", ["messages.ndjson", "messages.ndjson.gz"])
+def test_archive_file(tmp_path, filename, messages):
+    messages = messages * 10
+    path = tmp_path / filename
+    assert write_messages(path, messages) == len(messages)
+
+    with open(path, "rb") as fd:
+        assert (fd.read(2) == b"\x1f\x8b") == filename.endswith(".gz")
+    assert list(read_messages(path)) == messages
+    assert list(read_messages(path, ValidationLevel.trusted, chunk_size=100)) == (
+        messages
+    )
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_archive_file_object(compress, messages):
+    output = io.BytesIO()
+    with MessageArchiveWriter(output, compress=compress, chunk_size=10) as writer:
+        writer.write(messages[0])
+        assert writer.write_many(messages[1:]) == len(messages) - 1
+        assert writer.count == len(messages)
+    assert not output.closed
+
+    data = output.getvalue()
+    lines = (gzip.decompress(data) if compress else data).splitlines()
+    assert lines == [message.dump_bytes() for message in messages]
+    assert list(read_messages(io.BytesIO(data))) == messages
+
+
+def test_iter_lines():
+    data = b'\n{"a": 1}\n\n  \n{"b":\n' + b"x" * 1000 + b"\n{}"
+    expected = [b'{"a": 1}', b'{"b":', b"x" * 1000, b"{}"]
+    for chunk_size in (1, 7, 100, 10_000):
+        assert list(iter_lines(io.BytesIO(data), chunk_size=chunk_size)) == expected
+    compressed = gzip.compress(data)
+    assert list(iter_lines(io.BytesIO(compressed), chunk_size=7)) == expected
+    assert list(iter_lines(io.BytesIO(b""))) == []
+
+
+def test_read_invalid_message(messages):
+    message = messages[0]
+    data = message.dump_bytes() + b"\n" + b'{"type": "POST"}\n'
+    messages = read_messages(io.BytesIO(data))
+    assert next(messages) == message
+    with pytest.raises(ValidationError):
+        next(messages)
+
+
+def test_archive_pretty_printed_raw_json(messages):
+    message = messages[0]
+    json_data = json.dumps(message.model_dump(mode="json"), indent=2).encode()
+    raw_message = parse_message_json(
+        json_data, ValidationLevel.trusted, keep_raw_json=True
+    )
+    assert b"\n" in raw_message.dump_bytes()
+
+    output = io.BytesIO()
+    assert write_messages(output, [raw_message, message]) == 2
+    assert output.getvalue().count(b"\n") == 2
+    assert list(read_messages(io.BytesIO(output.getvalue()))) == [message, message]
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from aleph_message import MessageProjection, parse_message_fields
+from aleph_message.models import ItemHash, MessageType, parse_message
+
+GPU_MESSAGE = "instance_gpu_machine.json"
+
+
+@pytest.mark.parametrize("from_json", [False, True])
+def test_message_projection(from_json, load_message_dict):
+    message_dict = load_message_dict(GPU_MESSAGE)
+    del message_dict["channel"]
+    message = parse_message(message_dict)
+    projection = MessageProjection(
+        {"item_hash", "sender", "time", "size", "channel", "content.address"}
+    )
+    if from_json:
+        record = projection.parse_json(json.dumps(message_dict))
+    else:
+        record = projection.parse(message_dict)
+
+    assert record == {
+        "item_hash": message.item_hash,
+        "sender": message.sender,
+        "time": message.time,
+        "size": message.size,
+        "type": MessageType.instance,
+        "content": {"address": message.content.address},
+    }
+    assert isinstance(record["item_hash"], ItemHash)
+    # Optional fields are only included when present
+    assert "channel" not in record
+
+
+def test_message_projection_nested_fields(load_message_dict):
+    message_dict = load_message_dict(GPU_MESSAGE)
+    message = parse_message(message_dict)
+
+    record = parse_message_fields(
+        message_dict, ["content.resources.vcpus", "content.resources", "sender"]
+    )
+    assert record["content"]["resources"] == message.content.resources
+
+    record = parse_message_fields(
+        json.dumps(message_dict), ["content.requirements.node.node_hash"]
+    )
+    assert record["content"] == {
+        "requirements": {
+            "node": {"node_hash": message.content.requirements.node.node_hash}
+        }
+    }
+
+    # Content fields are ignored for the types of messages that do not have them
+    record = parse_message_fields(message_dict, ["content.key", "content.address"])
+    assert record["content"] == {"address": message.content.address}
+
+    # The content is decoded from item_content when missing, from a dict as
+    # from JSON
+    message_dict = load_message_dict("machine.json")
+    address = message_dict.pop("content")["address"]
+    for message in (message_dict, json.dumps(message_dict)):
+        record = parse_message_fields(message, ["content.address"])
+        assert record["content"]["address"] == address
+
+    # Other errors are raised as is
+    with pytest.raises(ValidationError, match="content"):
+        parse_message_fields(
+            json.dumps({**message_dict, "item_content": None}), ["content.address"]
+        )
+
+
+def test_message_projection_validation(load_message_dict):
+    message_dict = load_message_dict(GPU_MESSAGE)
+    projection = MessageProjection({"item_hash", "chain", "content.resources.vcpus"})
+
+    # Only the requested fields are validated
+    projection.parse({**message_dict, "sender": None})
+    message_dict["content"]["volumes"] = "invalid"
+    projection.parse(message_dict)
+
+    message_dict["content"]["resources"]["vcpus"] = "many"
+    with pytest.raises(ValidationError):
+        projection.parse(message_dict)
+    with pytest.raises(ValidationError):
+        projection.parse({**load_message_dict(GPU_MESSAGE), "chain": "UNKNOWN"})
+    with pytest.raises(ValidationError):
+        projection.parse({**load_message_dict(GPU_MESSAGE), "item_hash": "invalid"})
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [[], ["unknown"], ["sender.address"], ["content.unknown"], ["content..address"]],
+)
+def test_message_projection_invalid_fields(fields):
+    with pytest.raises(ValueError):
+        MessageProjection(fields)
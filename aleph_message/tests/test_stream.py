@@ -0,0 +1,72 @@
+import io
+import itertools
+import json
+
+import pytest
+
+from aleph_message.models import MessagesResponse
+from aleph_message.stream import MessagesResponseReader
+
+
+@pytest.fixture
+def messages_response_dict(message_dicts) -> dict:
+    return {
+        "messages": message_dicts,
+        "pagination_page": 1,
+        "pagination_total": 3,
+        "pagination_per_page": 20,
+        "pagination_item": "messages",
+    }
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_messages_response_reader(chunk_size, messages_response_dict):
+    data_dict = messages_response_dict
+    data = json.dumps(data_dict, indent=4).encode()
+
+    reader = MessagesResponseReader(io.BytesIO(data), chunk_size=chunk_size)
+    messages = list(reader)
+
+    response = MessagesResponse.model_validate(data_dict)
+    assert messages == response.messages
+    assert reader.pagination
+    assert reader.pagination.pagination_total == 3
+    assert reader.pagination.pagination_item == "messages"
+
+
+def test_messages_response_reader_sources(messages_response_dict):
+    data_dict = messages_response_dict
+    data = json.dumps(data_dict)
+
+    # Pagination fields may come before the messages
+    reordered = json.dumps(dict(reversed(data_dict.items())))
+    reader = MessagesResponseReader(io.StringIO(reordered))
+    assert len(list(reader.iter_raw())) == 3
+    assert reader.pagination and reader.pagination.pagination_per_page == 20
+
+    # Iterable of bytes chunks, such as streamed HTTP responses
+    chunks = (data.encode()[i : i + 100] for i in range(0, len(data), 100))
+    assert len(list(MessagesResponseReader(chunks))) == 3
+
+
+def test_messages_response_reader_invalid():
+    with pytest.raises(ValueError):
+        list(MessagesResponseReader(io.BytesIO(b'{"messages": [{}')))
+
+    with pytest.raises(ValueError):
+        list(MessagesResponseReader(io.BytesIO(b'["messages"]')))
+
+    # Unknown fields are rejected, as with `MessagesResponse`
+    data = b'{"messages": [], "unexpected": 1}'
+    with pytest.raises(ValueError):
+        list(MessagesResponseReader(io.BytesIO(data)))
+
+
+def test_messages_response_reader_max_value_size():
+    # Invalid JSON in a message is not buffered until the end of the response
+    chunks = itertools.chain(
+        [b'{"messages": [{"item_hash" "0x"'], itertools.repeat(b', "a": 1' * 10)
+    )
+    reader = MessagesResponseReader(chunks, chunk_size=10, max_value_size=1000)
+    with pytest.raises(ValueError, match="longer than 1000 characters"):
+        list(reader.iter_raw())
@@ -1,10 +1,23 @@
+import base64
 import copy
+from hashlib import sha256
 
 import pytest
 from pydantic import BaseModel, ValidationError
 
 from aleph_message.exceptions import UnknownHashError
 from aleph_message.models import ItemHash, ItemType
+from aleph_message.models import item_hash as item_hash_module
+from aleph_message.models.item_hash import (
+    ItemHashSet,
+    _BloomFilter,
+    _classify_many_numpy,
+    _classify_many_python,
+    digests_from_array,
+    digests_to_array,
+    pack_digests,
+    unpack_digests,
+)
 
 STORAGE_HASH = ItemHash(
     "b236db23bf5ad005ad7f5d82eed08a68a925020f0755b2a59c03f784499198eb"
@@ -103,3 +116,236 @@ def test_cidv1_rejects_invalid_alphabet():
         ItemHash("bafy" + "1" * 55)  # '1' not in base32
     with pytest.raises(UnknownHashError):
         ItemHash("bafy" + "Z" * 55)  # uppercase not allowed
+
+
+def test_item_type_cache():
+    assert ItemType.cache_info().maxsize == 0
+    ItemType.set_cache_size(2)
+    try:
+        assert ItemType.from_hash(STORAGE_HASH) == ItemType.storage
+        assert ItemType.from_hash(STORAGE_HASH) == ItemType.storage
+        assert ItemType.from_hash(IPFS_HASH) == ItemType.ipfs
+        assert ItemType.cache_info() == (1, 2, 2, 2)
+
+        # Oldest entries are evicted first
+        ItemType.from_hash(STORAGE_HASH.replace("b", "c"))
+        ItemType.from_hash(STORAGE_HASH)
+        assert ItemType.cache_info() == (1, 4, 2, 2)
+
+        # Invalid hashes are not cached
+        with pytest.raises(UnknownHashError):
+            ItemType.from_hash("fake-hash")
+        assert ItemType.cache_info().currsize == 2
+
+        ItemType.cache_clear()
+        assert ItemType.cache_info() == (0, 0, 2, 0)
+
+        with pytest.raises(ValueError):
+            ItemType.set_cache_size(-1)
+    finally:
+        ItemType.set_cache_size(0)
+    assert ItemType.cache_info() == (0, 0, 0, 0)
+
+
+@pytest.mark.parametrize(
+    "item_hash",
+    [
+        "Qm" + "1" * 41,  # too short
+        "Qm" + "1" * 45,  # too long
+        "Xm" + "1" * 42,  # wrong prefix
+        "bafy" + "a" * 54,
+        "bafz" + "a" * 55,
+        "a" * 63,
+        "a" * 65,
+        "é" * 64,
+        "",
+    ],
+)
+def test_unknown_hash_lengths_and_prefixes(item_hash):
+    with pytest.raises(UnknownHashError):
+        ItemType.from_hash(item_hash)
+
+
+def test_item_hash_has_no_dict():
+    assert not hasattr(STORAGE_HASH, "__dict__")
+    with pytest.raises(AttributeError):
+        STORAGE_HASH.item_type = ItemType.ipfs  # type: ignore
+
+
+def test_item_hash_digest():
+    digest = STORAGE_HASH.digest
+    assert len(digest) == 32
+    assert ItemHash.from_digest(digest) == STORAGE_HASH
+    assert isinstance(ItemHash.from_digest(digest), ItemHash)
+
+    # CIDv0 and CIDv1 of the same content share the same SHA-256 digest
+    cidv1 = ItemHash("bafybeiax64pfzzusica23t6yuombopiqp37x64ingmjblk2rvm4qguqrzy")
+    assert IPFS_HASH.digest == cidv1.digest
+    assert len(IPFS_HASH.digest) == 32
+
+    with pytest.raises(ValueError):
+        ItemHash.from_digest(digest[:31])
+
+
+def _cidv1(version: bytes, codec: bytes, multihash: bytes) -> ItemHash:
+    encoded = base64.b32encode(version + codec + multihash).decode()
+    # Built without validation, which only accepts the `bafy` prefix
+    return str.__new__(ItemHash, "b" + encoded.lower().rstrip("="))
+
+
+def test_item_hash_digest_cid_varints():
+    multihash = bytes([0x12, 32]) + IPFS_HASH.digest
+    # dag-json, of which the codec 0x0129 is encoded on two bytes
+    assert _cidv1(b"\x01", b"\xa9\x02", multihash).digest == IPFS_HASH.digest
+    assert _cidv1(b"\x01", b"\x70", multihash).digest == IPFS_HASH.digest
+
+    with pytest.raises(ValueError, match="not a CIDv1"):
+        _cidv1(b"\x02", b"\x70", multihash).digest
+    with pytest.raises(ValueError, match="not a SHA-256 CID"):
+        _cidv1(b"\x01", b"\xa9", multihash).digest
+    with pytest.raises(ValueError, match="Invalid varint"):
+        _cidv1(b"\x01", b"\xff" * 9, multihash).digest
+
+
+def test_pack_digests():
+    item_hashes = [STORAGE_HASH, ItemHash.from_digest(bytes(range(32)))]
+    packed = pack_digests(item_hashes)
+    assert packed == STORAGE_HASH.digest + bytes(range(32))
+    assert unpack_digests(packed) == item_hashes
+    assert unpack_digests(memoryview(packed)) == item_hashes
+    assert pack_digests([]) == b""
+
+    with pytest.raises(UnknownHashError):
+        pack_digests([STORAGE_HASH, IPFS_HASH])
+    with pytest.raises(UnknownHashError):
+        pack_digests(["X" * 64])
+    with pytest.raises(ValueError):
+        unpack_digests(packed[:-1])
+
+
+def test_digests_array():
+    np = pytest.importorskip("numpy")
+    item_hashes = [STORAGE_HASH, ItemHash.from_digest(bytes(range(32)))]
+
+    array = digests_to_array(item_hashes)
+    assert array.shape == (2, 32) and array.dtype == np.uint8
+    assert array[1].tolist() == list(range(32))
+    assert digests_from_array(array) == item_hashes
+    # Non-contiguous arrays are supported
+    assert digests_from_array(array[::-1]) == item_hashes[::-1]
+
+    with pytest.raises(ValueError):
+        digests_from_array(array[:, :16])
+
+
+def test_classify_many():
+    cidv1 = "bafybeiax64pfzzusica23t6yuombopiqp37x64ingmjblk2rvm4qguqrzy"
+    item_hashes = [
+        STORAGE_HASH,
+        IPFS_HASH,
+        cidv1,
+        STORAGE_HASH.upper(),
+        "Qm" + "0" * 44,
+        IPFS_HASH[:-2] + "\0" + IPFS_HASH[-1],
+        "bafz" + cidv1[4:],
+        "a" * 65,
+        "é" * 64,
+        "",
+    ]
+    expected = [ItemType.storage, ItemType.ipfs, ItemType.ipfs] + [None] * 7
+
+    classification = ItemType.classify_many(item_hashes)
+    assert classification.item_types == expected
+    assert classification.invalid == [item_type is None for item_type in expected]
+    assert ItemType.classify_many([]) == ([], [])
+    # Large batches give the same result, classified with NumPy if installed
+    assert ItemType.classify_many(item_hashes * 30).item_types == expected * 30
+
+    assert ItemHash.validate_many(item_hashes[:3]) == item_hashes[:3]
+    with pytest.raises(UnknownHashError, match="'Qm0000"):
+        ItemHash.validate_many(item_hashes[:3] + item_hashes[4:])
+
+
+def test_classify_many_numpy():
+    np = pytest.importorskip("numpy")
+    item_hashes = [
+        STORAGE_HASH,
+        IPFS_HASH,
+        STORAGE_HASH.upper(),
+        "Qm" + "0" * 44,
+        "é" * 64,
+        "",
+    ]
+    # The vectorized implementation matches the pure Python one
+    assert _classify_many_numpy(np, item_hashes) == _classify_many_python(item_hashes)
+
+
+def _no_numpy():
+    raise ImportError
+
+
+def test_bloom_filter_add_packed(monkeypatch):
+    pytest.importorskip("numpy")
+    digests = [sha256(str(i).encode()).digest() for i in range(1000)]
+    packed = _BloomFilter(capacity=500, false_positive_rate=0.01)
+    packed.add_packed(b"".join(digests))
+    # Digests added all at once set the same bits as one at a time
+    expected = _BloomFilter(capacity=500, false_positive_rate=0.01)
+    for digest in digests:
+        expected.add(digest)
+    assert packed.bits == expected.bits
+
+    monkeypatch.setattr(item_hash_module, "import_numpy", _no_numpy)
+    without_numpy = _BloomFilter(capacity=500, false_positive_rate=0.01)
+    without_numpy.add_packed(b"".join(digests))
+    assert without_numpy.bits == expected.bits
+
+
+@pytest.mark.parametrize("with_numpy", [True, False])
+def test_item_hash_set(monkeypatch, with_numpy):
+    if with_numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(item_hash_module, "import_numpy", _no_numpy)
+    # Small buffers and blocks, to build and merge several runs
+    monkeypatch.setattr(item_hash_module, "_BUFFER_SIZE", 100)
+    monkeypatch.setattr(item_hash_module, "_BLOCK_SIZE", 4)
+
+    item_hashes = [sha256(str(i).encode()).hexdigest() for i in range(1000)]
+    seen = ItemHashSet(capacity=100)
+    assert all(seen.add(item_hash) for item_hash in item_hashes)
+    assert not seen.add(item_hashes[10])
+    assert seen.add(IPFS_HASH) and not seen.add(IPFS_HASH)
+    assert len(seen) == 1001
+    assert all(item_hash in seen for item_hash in item_hashes)
+    assert IPFS_HASH in seen
+    assert sha256(b"unseen").hexdigest() not in seen
+    assert "invalid" not in seen and None not in seen
+    assert sorted(seen) == sorted(item_hashes + [IPFS_HASH])
+    assert all(isinstance(item_hash, ItemHash) for item_hash in seen)
+
+    with pytest.raises(UnknownHashError):
+        seen.add("invalid")
+
+    difference = seen - item_hashes[:500] - [IPFS_HASH]
+    assert sorted(difference) == sorted(item_hashes[500:])
+    assert item_hashes[0] not in difference and item_hashes[999] in difference
+
+    union = ItemHashSet(item_hashes[:600]) | ItemHashSet(item_hashes[400:])
+    assert len(union) == 1000
+    assert sorted(union) == sorted(item_hashes)
+    assert len(seen.union(union)) == len(seen)
+
+    # Unions and differences merge the digests of the sets in a single run
+    zero = ItemHash.from_digest(bytes(32))
+    left = ItemHashSet(item_hashes[:600] + [zero, IPFS_HASH])
+    right = ItemHashSet(item_hashes[400:])
+    union = left.union(right, [item_hashes[0]])
+    assert len(union._runs) == 1 and not union._buffer
+    assert sorted(union) == sorted(item_hashes + [zero, IPFS_HASH])
+    assert all(item_hash in union for item_hash in item_hashes)
+    difference = left - right
+    assert len(difference._runs) == 1
+    assert sorted(difference) == sorted(item_hashes[:400] + [zero, IPFS_HASH])
+    assert zero in difference and item_hashes[500] not in difference
+    assert len(left - left) == 0
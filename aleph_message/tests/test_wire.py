@@ -0,0 +1,130 @@
+import pytest
+
+from aleph_message.codes import (
+    CHAIN_CODES,
+    HASH_TYPE_CODES,
+    ITEM_TYPE_CODES,
+    MESSAGE_TYPE_CODES,
+)
+from aleph_message.models import (
+    Chain,
+    HashType,
+    ItemType,
+    MessageType,
+    ValidationLevel,
+    add_item_content_and_hash,
+    parse_message,
+)
+from aleph_message.wire import WIRE_VERSION, decode_message, encode_message
+
+STORAGE_HASH = "b236db23bf5ad005ad7f5d82eed08a68a925020f0755b2a59c03f784499198eb"
+CIDV0_HASH = "QmPxCe3eHVCdTG5uKnSZTsPGrYvMFTWAAt4PSfK7ETkz4d"
+
+
+def _assert_round_trip(message_dict: dict) -> None:
+    message = parse_message(message_dict)
+    data = encode_message(message)
+    decoded = decode_message(data)
+    assert decoded == message
+    assert decoded.model_dump_json() == message.model_dump_json()
+    assert decode_message(data, ValidationLevel.trusted) == message
+    assert len(data) < len(message.model_dump_json())
+
+
+@pytest.mark.parametrize("index", range(3))
+def test_round_trip(index, message_dicts):
+    # MongoDB identifiers are not encoded
+    _assert_round_trip(message_dicts[index])
+
+
+def test_round_trip_optional_fields(message_dicts):
+    message_dict = message_dicts[0]
+    _assert_round_trip(
+        {
+            **message_dict,
+            "item_type": "storage",
+            "item_content": None,
+            "item_hash": STORAGE_HASH,
+            "time": "2024-01-01T10:00:00.123456+02:00",
+            "confirmed": True,
+            "confirmations": [
+                {"chain": "ETH", "height": 1, "hash": {"$binary": "x", "$type": "00"}}
+            ],
+            "forgotten_by": [STORAGE_HASH],
+            "hash_type": "sha256",
+        }
+    )
+    _assert_round_trip(
+        {
+            **message_dict,
+            "item_type": "ipfs",
+            "item_content": None,
+            "item_hash": CIDV0_HASH,
+            "time": "2024-01-01T10:00:00.123456",
+            "confirmed": False,
+            "channel": None,
+            "size": None,
+        }
+    )
+
+
+def test_round_trip_content_differs_from_item_content():
+    content = {"address": "0x" + "1" * 40, "time": 1.0, "type": "test"}
+    message_dict = add_item_content_and_hash(
+        {
+            "chain": "ETH",
+            "sender": "0x" + "1" * 40,
+            "type": "POST",
+            "time": 1.0,
+            "item_type": "inline",
+            "content": content,
+            "signature": "0x0",
+        }
+    )
+    matching = parse_message(message_dict)
+    data = encode_message(matching, content_from_item_content=True)
+    assert len(data) < len(encode_message(matching))
+    assert decode_message(data) == matching
+
+    message_dict["content"] = {**content, "content": {"edited": True}}
+    message = parse_message(message_dict)
+    # The content is encoded by default, without being compared
+    data = encode_message(message)
+    assert decode_message(data) == message
+    assert decode_message(data).content.content == {"edited": True}
+    # It is taken from item_content otherwise, as trusted by the caller
+    data = encode_message(message, content_from_item_content=True)
+    assert decode_message(data).content.content is None
+
+
+def test_lazy_content(messages):
+    message = messages[1]
+    decoded = decode_message(encode_message(message), lazy_content=True)
+    assert not decoded.content_loaded
+    assert decoded == message
+
+
+def test_enum_codes():
+    assert set(CHAIN_CODES) == set(Chain)
+    assert set(MESSAGE_TYPE_CODES) == set(MessageType)
+    assert set(ITEM_TYPE_CODES) == set(ItemType)
+    assert set(HASH_TYPE_CODES) == set(HashType)
+    # Codes are part of the format and must not change
+    assert CHAIN_CODES[Chain.ETH] == 11
+    assert MESSAGE_TYPE_CODES[MessageType.instance] == 4
+
+
+def test_invalid_data(messages):
+    data = encode_message(messages[0])
+    with pytest.raises(ValueError, match="Not an encoded message"):
+        decode_message(b"XX" + data[2:])
+    with pytest.raises(ValueError, match="Unsupported version"):
+        decode_message(data[:2] + bytes([WIRE_VERSION + 1]) + data[3:])
+    with pytest.raises(ValueError, match="Truncated"):
+        decode_message(data[:10])
+    with pytest.raises(ValueError, match="Truncated"):
+        decode_message(data[:-1])
+    with pytest.raises(ValueError, match="Unexpected data"):
+        decode_message(data + b"\0")
+    with pytest.raises(ValueError, match="Unknown enum value"):
+        decode_message(data[:5] + b"\xff" + data[6:])
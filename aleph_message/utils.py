@@ -15,3 +15,14 @@ def gigabyte_to_mebibyte(n: Gigabytes) -> Mebibytes:
     mebibyte = 2**20
     gigabyte = 10**9
     return Mebibytes(math.ceil(n * gigabyte / mebibyte))
+
+
+def import_numpy():
+    """Import NumPy, which is an optional dependency, see the `numpy` extra."""
+    try:
+        import numpy
+    except ImportError as error:
+        raise ImportError(
+            "NumPy is required for this feature: pip install aleph-message[numpy]"
+        ) from error
+    return numpy
@@ -0,0 +1,260 @@
+"""Compact binary encoding of messages, for services that exchange them.
+
+An encoded message starts with a fixed header holding the format version,
+its enums as single bytes and its time as a float64, followed by its strings
+prefixed by their length. Storage item hashes are encoded as their 32 bytes
+digest. Contents are carried as JSON, except the ones of inline messages
+with `content_from_item_content`, which are decoded from their
+`item_content`.
+
+    data = encode_message(message)
+    assert decode_message(data) == message
+
+MongoDB identifiers are not encoded, as in `BaseMessage.dump_bytes`.
+"""
+
+import datetime
+import json
+import struct
+from typing import Any, Dict, List, Tuple
+
+from pydantic import TypeAdapter
+
+from .codes import (
+    CHAIN_CODES,
+    CHAINS,
+    HASH_TYPE_CODES,
+    HASH_TYPES,
+    ITEM_TYPE_CODES,
+    ITEM_TYPES,
+    MESSAGE_TYPE_CODES,
+    MESSAGE_TYPES,
+)
+from .models import (
+    AlephMessage,
+    ItemType,
+    MessageConfirmation,
+    ValidationLevel,
+    parse_message,
+)
+from .models.item_hash import DIGEST_SIZE, STORAGE_HASH_LENGTH, ItemHash
+
+WIRE_MAGIC = b"AM"
+WIRE_VERSION = 1
+
+# Magic, version, flags, chain, type, item type, hash type, time and offset
+# of the time zone in seconds.
+_HEADER = struct.Struct("<2sBHBBBBdi")
+_LENGTH = struct.Struct("<I")
+_SIZE = struct.Struct("<q")
+
+# Flags of the optional parts of a message.
+_CHANNEL = 1 << 0
+_SIGNATURE = 1 << 1
+_SIZE_SET = 1 << 2
+_ITEM_CONTENT = 1 << 3
+_CONTENT = 1 << 4
+_CONFIRMATIONS = 1 << 5
+_CONFIRMED = 1 << 6
+_CONFIRMED_TRUE = 1 << 7
+_FORGOTTEN_BY = 1 << 8
+_STORAGE_HASH = 1 << 9
+_NAIVE_TIME = 1 << 10
+_HASH_TYPE = 1 << 11
+
+_confirmations_adapter: TypeAdapter[List[MessageConfirmation]] = TypeAdapter(
+    List[MessageConfirmation]
+)
+
+
+def _encode_time(time: datetime.datetime) -> Tuple[float, int, int]:
+    """Timestamp, offset of the time zone and flags of a time."""
+    offset = time.utcoffset()
+    if offset is None:
+        # Naive times are encoded as UTC, to be restored as they are.
+        timestamp = time.replace(tzinfo=datetime.timezone.utc).timestamp()
+        return timestamp, 0, _NAIVE_TIME
+    return time.timestamp(), int(offset.total_seconds()), 0
+
+
+def _decode_time(timestamp: float, offset: int, flags: int) -> datetime.datetime:
+    if flags & _NAIVE_TIME:
+        time = datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc)
+        return time.replace(tzinfo=None)
+    if offset:
+        timezone = datetime.timezone(datetime.timedelta(seconds=offset))
+    else:
+        timezone = datetime.timezone.utc
+    return datetime.datetime.fromtimestamp(timestamp, timezone)
+
+
+def encode_message(
+    message: AlephMessage, content_from_item_content: bool = False
+) -> bytes:
+    """Binary encoding of a message, see `decode_message`.
+
+    With `content_from_item_content`, the content of inline messages is not
+    encoded, and is decoded from their `item_content`. The caller guarantees
+    that they match, which `parse_message` does not check for all types of
+    messages: this is not checked.
+    """
+    flags = 0
+    parts: List[bytes] = []
+
+    def add_string(value: str) -> None:
+        data = value.encode()
+        parts.append(_LENGTH.pack(len(data)))
+        parts.append(data)
+
+    if message.size is not None:
+        flags |= _SIZE_SET
+        parts.append(_SIZE.pack(message.size))
+    if len(message.item_hash) == STORAGE_HASH_LENGTH:
+        flags |= _STORAGE_HASH
+        parts.append(message.item_hash.digest)
+    else:
+        add_string(message.item_hash)
+    add_string(message.sender)
+    if message.channel is not None:
+        flags |= _CHANNEL
+        add_string(message.channel)
+    if message.signature is not None:
+        flags |= _SIGNATURE
+        add_string(message.signature)
+    if message.item_content is not None:
+        flags |= _ITEM_CONTENT
+        add_string(message.item_content)
+    if not (
+        content_from_item_content
+        and message.item_type == ItemType.inline
+        and message.item_content is not None
+    ):
+        flags |= _CONTENT
+        add_string(message.content.model_dump_json())
+    if message.confirmations is not None:
+        flags |= _CONFIRMATIONS
+        confirmations = _confirmations_adapter.dump_json(
+            message.confirmations, by_alias=True
+        )
+        add_string(confirmations.decode())
+    if message.forgotten_by is not None:
+        flags |= _FORGOTTEN_BY
+        add_string(json.dumps(message.forgotten_by, separators=(",", ":")))
+    if message.confirmed is not None:
+        flags |= _CONFIRMED
+        if message.confirmed:
+            flags |= _CONFIRMED_TRUE
+    hash_type = 0
+    if message.hash_type is not None:
+        flags |= _HASH_TYPE
+        hash_type = HASH_TYPE_CODES[message.hash_type]
+
+    timestamp, offset, time_flags = _encode_time(message.time)
+    header = _HEADER.pack(
+        WIRE_MAGIC,
+        WIRE_VERSION,
+        flags | time_flags,
+        CHAIN_CODES[message.chain],
+        MESSAGE_TYPE_CODES[message.type],
+        ITEM_TYPE_CODES[message.item_type],
+        hash_type,
+        timestamp,
+        offset,
+    )
+    return header + b"".join(parts)
+
+
+class _Reader:
+    __slots__ = ("data", "position")
+
+    def __init__(self, data: memoryview, position: int):
+        self.data = data
+        self.position = position
+
+    def read(self, size: int) -> memoryview:
+        end = self.position + size
+        if end > len(self.data):
+            raise ValueError("Truncated message")
+        chunk = self.data[self.position : end]
+        self.position = end
+        return chunk
+
+    def read_string(self) -> str:
+        (length,) = _LENGTH.unpack(self.read(_LENGTH.size))
+        return str(self.read(length), "utf-8")
+
+
+def decode_message(
+    data: bytes,
+    validation_level: ValidationLevel = ValidationLevel.full,
+    lazy_content: bool = False,
+) -> AlephMessage:
+    """Message from its binary encoding, see `encode_message`.
+
+    The decoded message is validated by `parse_message`: use
+    `ValidationLevel.trusted` for messages encoded from validated messages.
+    Raises a `ValueError` if the data is not a valid encoding.
+    """
+    view = memoryview(data)
+    if len(view) < _HEADER.size:
+        raise ValueError("Truncated message")
+    (
+        magic,
+        version,
+        flags,
+        chain,
+        message_type,
+        item_type,
+        hash_type,
+        timestamp,
+        offset,
+    ) = _HEADER.unpack_from(view)
+    if magic != WIRE_MAGIC:
+        raise ValueError("Not an encoded message")
+    if version != WIRE_VERSION:
+        raise ValueError(f"Unsupported version {version} of the wire format")
+    reader = _Reader(view, _HEADER.size)
+
+    try:
+        message_dict: Dict[str, Any] = {
+            "chain": CHAINS[chain],
+            "type": MESSAGE_TYPES[message_type],
+            "item_type": ITEM_TYPES[item_type],
+            "time": _decode_time(timestamp, offset, flags),
+        }
+        if flags & _HASH_TYPE:
+            message_dict["hash_type"] = HASH_TYPES[hash_type]
+    except IndexError:
+        raise ValueError("Unknown enum value in message") from None
+    if flags & _SIZE_SET:
+        (message_dict["size"],) = _SIZE.unpack(reader.read(_SIZE.size))
+    if flags & _STORAGE_HASH:
+        message_dict["item_hash"] = ItemHash.from_digest(
+            bytes(reader.read(DIGEST_SIZE))
+        )
+    else:
+        message_dict["item_hash"] = reader.read_string()
+    message_dict["sender"] = reader.read_string()
+    optional_strings: List[Tuple[int, str]] = [
+        (_CHANNEL, "channel"),
+        (_SIGNATURE, "signature"),
+        (_ITEM_CONTENT, "item_content"),
+    ]
+    for flag, name in optional_strings:
+        message_dict[name] = reader.read_string() if flags & flag else None
+    if flags & _CONTENT:
+        message_dict["content"] = json.loads(reader.read_string())
+    if flags & _CONFIRMATIONS:
+        message_dict["confirmations"] = json.loads(reader.read_string())
+    if flags & _FORGOTTEN_BY:
+        message_dict["forgotten_by"] = json.loads(reader.read_string())
+    if flags & _CONFIRMED:
+        message_dict["confirmed"] = bool(flags & _CONFIRMED_TRUE)
+    if reader.position != len(view):
+        raise ValueError("Unexpected data after the message")
+    return parse_message(
+        message_dict,
+        validation_level,
+        lazy_content=lazy_content,
+        content_from_item_content=True,
+    )